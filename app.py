@@ -15,9 +15,10 @@ import base64
 from utils.auth import authenticate_user, create_user
 from utils.database import get_user_products, get_all_products, get_user_messages
 from utils.recommendations import get_recommendations
-from utils.translations import get_translation, LANGUAGES
+from utils.translations import get_translation, get_crop_name, LANGUAGES
 from utils.weather import get_weather_info
 from utils.payments import process_mobile_payment
+from utils.thumbnails import get_thumbnail
 from data.crops import AFRICAN_CROPS
 from data.locations import AFRICAN_LOCATIONS
 from modules.marketplace import marketplace_page
@@ -224,8 +225,9 @@ def home_page():
     featured_crops = AFRICAN_CROPS[:3]
     for i, crop in enumerate(featured_crops):
         with [products_col1, products_col2, products_col3][i]:
-            st.image(f"https://via.placeholder.com/200x150?text={crop['name']}", use_column_width=True)
-            st.write(f"**{crop['name']}**")
+            st.image(get_thumbnail(f"https://via.placeholder.com/200x150?text={crop['name']}", (200, 150), crop['name']), use_column_width=True)
+            local_name = get_crop_name(crop['name'], st.session_state.language)
+            st.write(f"**{local_name}**" if local_name == crop['name'] else f"**{local_name}** ({crop['name']})")
             st.write(f"💰 ${crop['price_per_kg']:.2f}/kg")
             st.write(f"📍 {crop['region']}")
             if st.button(f"{get_translation('view_details', st.session_state.language)}", key=f"featured_{i}"):
@@ -348,7 +350,11 @@ def payment_page():
 
         if st.button(get_translation("process_payment", st.session_state.language)):
             if phone_number:
-                result = process_mobile_payment(payment_method, phone_number, total_amount)
+                result = process_mobile_payment(
+                    payment_method, phone_number, total_amount,
+                    buyer_email=st.session_state.user.get('email'),
+                    items=[item['product']['name'] for item in st.session_state.cart]
+                )
                 if result['success']:
                     st.success(get_translation("payment_success", st.session_state.language))
                     st.balloons()
@@ -0,0 +1,107 @@
+# Marketplace query latency: columnar NumPy masks vs. the per-product Python loop
+#
+#   python -m benchmarks.catalog_benchmark
+#   python -m benchmarks.catalog_benchmark --size 20000 --repeat 50
+
+import argparse
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.search_benchmark import make_listing
+from data.locations import find_coordinates
+from utils.catalog import get_catalog_columns, query_products
+
+QUERIES = [
+    ('all, default order', {}, None),
+    ('category', {'category': 'Grains'}, 'rating'),
+    ('price range', {'min_price': 1.0, 'max_price': 4.0}, 'price_asc'),
+    ('category + price + organic', {'category': 'Vegetables', 'min_price': 0.5, 'max_price': 3.0, 'organic': True}, 'price_desc'),
+    ('organic + fresh', {'organic': True, 'fresh': True}, 'rating'),
+    ('category + 2 locations', {'category': 'Fruits', 'location': ['Kenya', 'Ghana'], 'organic': True}, 'rating'),
+    ('fresh, nearest first', {'fresh': True, 'origin': 'Nairobi, Kenya'}, 'distance'),
+    ('category, nearest first', {'category': 'Fruits', 'origin': 'Accra, Ghana'}, 'distance'),
+]
+
+def distance_km(origin, location):
+    """Great-circle distance between two locations, infinite when one is unknown"""
+    a, b = find_coordinates(origin), find_coordinates(location)
+    if a is None or b is None:
+        return math.inf
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+def make_product(i, rng, now):
+    """Build a listing with the rating, organic and date fields the filters use"""
+    product = make_listing(i, rng)
+    product['rating'] = round(rng.uniform(3.0, 5.0), 1)
+    product['organic'] = rng.random() < 0.3
+    product['harvest_date'] = (now - timedelta(days=rng.randint(0, 30))).isoformat()
+    product['expiry_date'] = (now + timedelta(days=rng.randint(-5, 30))).isoformat()
+    return product
+
+def loop_query(products, filters, sort, limit):
+    """The pre-columnar query: filter with a Python loop, then list.sort with a lambda"""
+    now = datetime.now()
+    matches = []
+    for p in products:
+        if filters.get('category') and p['category'] != filters['category']:
+            continue
+        if filters.get('min_price') is not None and p['price'] < filters['min_price']:
+            continue
+        if filters.get('max_price') is not None and p['price'] > filters['max_price']:
+            continue
+        if filters.get('organic') and not p['organic']:
+            continue
+        if filters.get('location') and p['location'] not in filters['location']:
+            continue
+        if filters.get('fresh') and (datetime.fromisoformat(p['harvest_date']) < now - timedelta(days=7)
+                                     or datetime.fromisoformat(p['expiry_date']) < now):
+            continue
+        matches.append(p)
+
+    keys = {
+        None: lambda p: p['id'],
+        'rating': lambda p: (-p['rating'], p['id']),
+        'price_asc': lambda p: (p['price'], p['id']),
+        'price_desc': lambda p: (-p['price'], p['id']),
+        'distance': lambda p: (distance_km(filters['origin'], p['location']), p['id']),
+    }
+    matches.sort(key=keys[sort])
+    return matches[:limit]
+
+def median_ms(run, repeat):
+    """Get the median wall time of run() in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Marketplace filter/sort latency")
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    now = datetime.now()
+    products = [make_product(i, rng, now) for i in range(1, args.size + 1)]
+
+    start = time.perf_counter()
+    get_catalog_columns(products)
+    print(f"Built columns for {args.size} products in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'query (ms)':<28} {'hits':>7} {'columnar':>9} {'loop':>9}")
+    for label, filters, sort in QUERIES:
+        hits = query_products(filters, sort, products=products)['total']
+        columnar = median_ms(lambda: query_products(filters, sort, products=products), args.repeat)
+        loop = median_ms(lambda: loop_query(products, filters, sort, 12), max(1, args.repeat // 4))
+        print(f"{label:<28} {hits:>7} {columnar:>9.3f} {loop:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Full-text product search latency: inverted index vs. a linear substring scan.
+# 'cold' is the first run of a query after an index change; later runs reuse
+# the cached per-token scores ('warm').
+#
+#   python -m benchmarks.search_benchmark
+#   python -m benchmarks.search_benchmark --size 20000 --repeat 50
+
+import argparse
+import random
+import statistics
+import time
+
+from data.crops import AFRICAN_CROPS
+from utils.search import InvertedIndex
+from utils.catalog import SEARCH_FIELDS
+from utils.translations import get_crop_synonyms
+
+LOCATIONS = ['Nigeria', 'Ghana', 'Kenya', 'Ethiopia', 'Tanzania', 'Uganda', 'Senegal', 'Mali',
+             'Cameroon', 'Rwanda', 'Zambia', 'Malawi', 'Burkina Faso', 'Ivory Coast']
+ADJECTIVES = ['Fresh', 'Dried', 'Organic', 'Premium', 'Sun-dried', 'Hand-picked', 'Sorted', 'Graded']
+QUERIES = ['maize', 'mai', 'fresh tomato', 'organic rice kenya', 'cassava', 'sweet potato ghana',
+           'premium coffee', 'or', 'groundnut mali', 'zzz', 'mahindi', 'casava kenya', 'tomatos']
+
+def make_listing(i, rng):
+    """Build a product listing with a realistic mix of crop names and places"""
+    crop = rng.choice(AFRICAN_CROPS)
+    location = rng.choice(LOCATIONS)
+    return {
+        'id': i,
+        'name': crop['name'],
+        'category': crop['category'],
+        'price': crop['price_per_kg'],
+        'description': f"{rng.choice(ADJECTIVES)} {crop['name']} from {location}, batch {i}",
+        'location': location
+    }
+
+def linear_search(products, query):
+    """The pre-index marketplace search: substring match over name and description"""
+    query = query.lower()
+    return [p for p in products if query in p['name'].lower() or query in p['description'].lower()]
+
+def time_queries(search, repeat):
+    """Get per-query latencies in ms for every benchmark query"""
+    results = {}
+    for query in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches = search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[query] = (len(matches), timings)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search latency")
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    products = [make_listing(i, rng) for i in range(1, args.size + 1)]
+
+    start = time.perf_counter()
+    index = InvertedIndex(SEARCH_FIELDS, synonyms=get_crop_synonyms())
+    for position, product in enumerate(products):
+        index.add(position, product)
+    index.prepare()
+    build = time.perf_counter() - start
+    print(f"Indexed {args.size} listings in {build:.2f}s ({len(index.postings)} terms)")
+
+    indexed = time_queries(index.search, args.repeat)
+    scanned = time_queries(lambda q: linear_search(products, q), max(1, args.repeat // 4))
+
+    print(f"{'query (ms)':<22} {'hits':>7} {'cold':>8} {'warm p50':>10} {'scan p50':>10}")
+    for query in QUERIES:
+        hits, timings = indexed[query]
+        warm = statistics.median(timings[1:]) if len(timings) > 1 else timings[0]
+        scan = statistics.median(scanned[query][1])
+        print(f"{query:<22} {hits:>7} {timings[0]:>8.3f} {warm:>10.3f} {scan:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Typo and local-name search examples, checked against crop search, the
+# marketplace product index and fuzzy term matching. Exits non-zero when an
+# example stops matching, so it can gate changes to utils/search.py.
+#
+#   python -m benchmarks.search_examples
+
+import random
+import sys
+
+from benchmarks.search_benchmark import make_listing
+from data.crops import search_crops
+from utils.catalog import SEARCH_FIELDS
+from utils.search import InvertedIndex, TrigramIndex
+from utils.translations import get_crop_synonyms
+
+# (query, crop expected as the top result)
+EXAMPLES = [
+    ('maize', 'Maize'),
+    ('miaze', 'Maize'),
+    ('mahindi', 'Maize'),
+    ('mais', 'Maize'),
+    ('casava', 'Cassava'),
+    ('cassvaa', 'Cassava'),
+    ('muhogo', 'Cassava'),
+    ('tomatos', 'Tomatoes'),
+    ('tomatoe', 'Tomatoes'),
+    ('sorgum', 'Sorghum'),
+    ('cofee', 'Coffee Beans'),
+    ('banans', 'Bananas'),
+    ('pinaepple', 'Pineapples'),
+    ('groundnust', 'Groundnuts'),
+    ('rcie', 'Rice'),
+    ('mchele', 'Rice'),
+]
+
+# (misspelt term, vocabulary terms all expected among its fuzzy matches)
+FUZZY_EXAMPLES = [
+    ('tomatos', ['tomato', 'tomatoes']),
+    ('casava', ['cassava']),
+]
+FUZZY_VOCABULARY = ['tomato', 'tomatoes', 'potato', 'potatoes', 'cassava', 'maize', 'millet']
+
+def main():
+    rng = random.Random(42)
+    products = [make_listing(i, rng) for i in range(1, 5001)]
+    index = InvertedIndex(SEARCH_FIELDS, synonyms=get_crop_synonyms())
+    for position, product in enumerate(products):
+        index.add(position, product)
+
+    failures = 0
+    for query, expected in EXAMPLES:
+        crops = [crop['name'] for crop in search_crops(query)]
+        scores = index.search(query)
+        top = products[max(scores, key=lambda position: (scores[position], -position))]['name'] if scores else None
+
+        ok = bool(crops) and crops[0] == expected and top == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {query:<12} crops: {crops[:2]}  products: {top}")
+
+    vocabulary = TrigramIndex()
+    for term in FUZZY_VOCABULARY:
+        vocabulary.add(term)
+    for term, expected in FUZZY_EXAMPLES:
+        found = [match for match, _ in vocabulary.similar(term, limit=5)]
+        ok = all(match in found for match in expected)
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {term:<12} fuzzy: {found}")
+
+    total = len(EXAMPLES) + len(FUZZY_EXAMPLES)
+    print(f"{total - failures}/{total} examples pass")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Load/dump time and file size of each snapshot serializer
+#
+#   python -m benchmarks.serializer_benchmark
+#   python -m benchmarks.serializer_benchmark --products 10000 --messages 100000
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.storage_benchmark import make_product
+from utils import serializers
+from utils.filestore import read_data, write_data_atomic
+
+def make_message(i):
+    """Build a message record shaped like the ones add_message stores"""
+    return {
+        'id': i,
+        'from': f"buyer{i % 20000}@example.com",
+        'to': f"farmer{i % 5000}@example.com",
+        'subject': 'Bulk Order Request',
+        'content': f"Hi, I would like to order {i % 500} kg. What's your best price?",
+        'timestamp': '2025-07-05T18:17:05.428159',
+        'read': i % 2 == 0
+    }
+
+def measure(records, fmt, path):
+    """Time a full dump and load of records in one format"""
+    start = time.perf_counter()
+    write_data_atomic(path, records, fmt)
+    dump_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded = read_data(path)
+    load_time = time.perf_counter() - start
+
+    assert len(loaded) == len(records)
+    return dump_time, load_time, os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot serializer benchmark")
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    datasets = {
+        f"{args.products} products": [make_product(i) for i in range(1, args.products + 1)],
+        f"{args.messages} messages": [make_message(i) for i in range(1, args.messages + 1)],
+    }
+
+    print(f"{'dataset':<18} {'format':<8} {'dump (s)':>9} {'load (s)':>9} {'size (MB)':>10}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name, records in datasets.items():
+            for fmt in serializers.FORMATS:
+                if serializers.get_format(fmt) != fmt:
+                    print(f"{name:<18} {fmt:<8} {'not installed':>30}")
+                    continue
+                dump_time, load_time, size = measure(records, fmt, os.path.join(data_dir, f"{fmt}.json"))
+                print(f"{name:<18} {fmt:<8} {dump_time:>9.3f} {load_time:>9.3f} {size / 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Similar-product search: recall and latency of the LSH index against exact
+# brute-force search over the same product vectors. Recall@k is the share of
+# the exact top k that the approximate search also returns.
+#
+#   python -m benchmarks.similarity_benchmark
+#   python -m benchmarks.similarity_benchmark --sizes 10000 100000 --queries 500
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.search_benchmark import LOCATIONS
+from data.crops import AFRICAN_CROPS
+from utils.vectors import LSHIndex, ProductVectors, exact_neighbors
+
+def make_product(i, rng):
+    """Build a crop-like product with jittered price and nutrition values"""
+    crop = rng.choice(AFRICAN_CROPS)
+    return {
+        'id': i,
+        'name': crop['name'],
+        'category': crop['category'],
+        'region': rng.choice(LOCATIONS + [crop['region']] * 4),
+        'season': crop['season'] if rng.random() < 0.9 else rng.choice(['wet', 'dry', 'year-round']),
+        'price_per_kg': round(crop['price_per_kg'] * rng.uniform(0.5, 1.8), 2),
+        'water_requirement': crop['water_requirement'],
+        'nutrition': {name: value * rng.uniform(0.8, 1.2) for name, value in crop['nutrition'].items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate vs. exact similar-product search")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--tables', type=int, default=8)
+    parser.add_argument('--bits', type=int, default=24)
+    parser.add_argument('--probes', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'build s':>8} {'exact ms':>9} {'batch ms/q':>11} {'lsh ms':>8} {'candidates':>11} {'recall@' + str(args.k):>10}")
+    for size in args.sizes:
+        rng = random.Random(42)
+        products = [make_product(i, rng) for i in range(size)]
+        matrix = ProductVectors(products).matrix
+        queries = matrix[rng.sample(range(size), min(args.queries, size))]
+
+        start = time.perf_counter()
+        index = LSHIndex(matrix, tables=args.tables, bits=args.bits, probes=args.probes)
+        build = time.perf_counter() - start
+
+        exact_timings, lsh_timings, recalls, candidates = [], [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            expected, _ = exact_neighbors(matrix, query[None, :], args.k)
+            exact_timings.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            found, _ = index.search(query, args.k)
+            lsh_timings.append((time.perf_counter() - start) * 1000)
+
+            # Rows tied with the k-th exact score are equally correct answers
+            kth = float(matrix[expected[0][-1]] @ query)
+            recalls.append(min(1.0, np.count_nonzero(matrix[found] @ query >= kth - 1e-6) / args.k))
+            candidates.append(len(index.candidates(query)))
+
+        start = time.perf_counter()
+        exact_neighbors(matrix, queries, args.k)
+        batch = (time.perf_counter() - start) * 1000 / len(queries)
+
+        print(f"{size:>9} {build:>8.2f} {statistics.median(exact_timings):>9.3f} {batch:>11.3f} "
+              f"{statistics.median(lsh_timings):>8.3f} {int(statistics.median(candidates)):>11} {statistics.mean(recalls):>10.3f}")
+
+if __name__ == "__main__":
+    main()
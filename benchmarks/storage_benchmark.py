@@ -0,0 +1,64 @@
+# Per-insert latency of the storage backends as the product catalog grows
+#
+#   python -m benchmarks.storage_benchmark
+#   python -m benchmarks.storage_benchmark --backend json --sizes 1000 5000
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from utils.storage import JsonBackend, SQLiteBackend
+
+def make_product(i):
+    """Build a product record shaped like the ones add_product stores"""
+    return {
+        'id': i,
+        'name': f"Crop {i % 500}",
+        'category': ['Grains', 'Vegetables', 'Fruits', 'Legumes', 'Tubers'][i % 5],
+        'price': round(0.5 + (i % 100) / 10, 2),
+        'quantity': 50 + i % 450,
+        'description': f"Fresh crop batch {i}",
+        'seller_email': f"farmer{i % 5000}@example.com",
+        'seller_name': f"Farmer {i % 5000}",
+        'location': 'Nigeria',
+        'organic': i % 3 == 0,
+        'available': True
+    }
+
+def measure_inserts(backend, size, inserts):
+    """Prefill a backend with size products and time single inserts on top"""
+    backend.replace_all('products', [make_product(i) for i in range(1, size + 1)])
+
+    timings = []
+    for i in range(inserts):
+        record = make_product(size + i + 1)
+        del record['id']
+        start = time.perf_counter()
+        backend.insert('products', record)
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backend per-insert latency")
+    parser.add_argument('--backend', choices=['sqlite', 'json'], default='sqlite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--inserts', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'mean (ms)':>10} {'p95 (ms)':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            if args.backend == 'sqlite':
+                backend = SQLiteBackend(os.path.join(data_dir, "bench.db"), data_dir=data_dir, migrate=False)
+            else:
+                backend = JsonBackend(data_dir)
+
+            timings = measure_inserts(backend, size, args.inserts)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"{size:>10} {statistics.mean(timings) * 1000:>10.3f} {p95 * 1000:>10.3f}")
+
+if __name__ == "__main__":
+    main()
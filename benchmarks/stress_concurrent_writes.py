@@ -0,0 +1,81 @@
+# Multi-process stress test for the JSON stores: many writers hammer the same
+# files at once and every write must survive
+#
+#   python -m benchmarks.stress_concurrent_writes
+#   python -m benchmarks.stress_concurrent_writes --writers 50 --writes 20
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+
+from utils.storage import JsonBackend, set_backend
+
+def writer(data_dir, worker, writes, start):
+    """Write products, messages, payments and users from one process"""
+    set_backend(JsonBackend(data_dir))
+
+    from utils.auth import create_user
+    from utils.database import add_message, add_product
+    from utils.payments import log_transaction
+
+    start.wait()
+    for i in range(writes):
+        add_product({'name': f"Crop {worker}-{i}", 'seller_email': f"farmer{worker}@example.com"})
+        add_message(f"farmer{worker}@example.com", "buyer@example.com", "Offer", f"Message {worker}-{i}")
+        log_transaction({'transaction_id': f"T{worker}-{i}", 'amount': 1.0, 'status': 'completed'})
+        create_user(f"User {worker}-{i}", f"user{worker}-{i}@example.com", "254700000000", "secret", 'buyer', 'Nairobi, Kenya')
+
+    # Every writer races to register the same email; exactly one may win
+    create_user("Shared", "shared@example.com", "254700000000", "secret", 'buyer', 'Nairobi, Kenya')
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writer stress test")
+    parser.add_argument('--writers', type=int, default=50)
+    parser.add_argument('--writes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        start = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(target=writer, args=(data_dir, worker, args.writes, start))
+            for worker in range(args.writers)
+        ]
+        for process in processes:
+            process.start()
+
+        began = time.perf_counter()
+        start.set()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - began
+
+        backend = JsonBackend(data_dir)
+        expected = args.writers * args.writes
+        results = {}
+        for collection in ['products', 'messages', 'payment_logs', 'users']:
+            records = backend.load_all(collection)
+            if collection == 'users':
+                records = [r for r in records if r['email'] != "shared@example.com"]
+            results[collection] = (len(records), len({r['id'] for r in records}))
+        shared_users = len(backend.find('users', ['email'], "shared@example.com"))
+
+    failed = any(p.exitcode != 0 for p in processes)
+    print(f"{args.writers} writers x {args.writes} writes in {elapsed:.1f}s")
+    for collection, (count, unique_ids) in results.items():
+        if count != expected:
+            status = "LOST UPDATES"
+        elif unique_ids != count:
+            status = "DUPLICATE IDS"
+        else:
+            status = "ok"
+        failed = failed or status != "ok"
+        print(f"  {collection:<14} {count:>6} / {expected:<6} {status}")
+    print(f"  {'shared email':<14} {shared_users:>6} / 1      {'ok' if shared_users == 1 else 'DUPLICATES'}")
+    failed = failed or shared_users != 1
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
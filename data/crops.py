@@ -1,5 +1,10 @@
 # African crops database with realistic market data
 
+import json
+from utils.cache import result_cache
+from utils.search import InvertedIndex, normalize_query
+from utils.translations import get_crop_synonyms
+
 AFRICAN_CROPS = [
     # Grains and Cereals
     {
@@ -471,30 +476,50 @@ def get_price_range(category=None):
         'average': sum(prices) / len(prices)
     }
 
+_crop_index = None
+
+def get_crop_index():
+    """Get the full-text index over AFRICAN_CROPS, built on first use"""
+    global _crop_index
+    if _crop_index is None:
+        index = InvertedIndex({'name': 3.0, 'category': 1.5, 'region': 1.0}, synonyms=get_crop_synonyms())
+        for position, crop in enumerate(AFRICAN_CROPS):
+            index.add(position, crop)
+        _crop_index = index
+    return _crop_index
+
 def search_crops(query, filters=None):
-    """Search crops by name or description with optional filters"""
+    """Search crops by name (English or local), category or region with optional filters, best matches first"""
+    # AFRICAN_CROPS is static, so results only depend on the query and filters
+    key = ('crops', normalize_query(query), json.dumps(filters or {}, sort_keys=True, default=str))
+    cached = result_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
     results = []
-    query = query.lower()
+
+    if query.strip():
+        scores = get_crop_index().search(query)
+        positions = sorted(scores, key=lambda position: (-scores[position], position))
+        candidates = [AFRICAN_CROPS[position] for position in positions]
+    else:
+        candidates = AFRICAN_CROPS
     
-    for crop in AFRICAN_CROPS:
-        # Search in name and category
-        if (query in crop['name'].lower() or 
-            query in crop['category'].lower() or 
-            query in crop['region'].lower()):
-            
-            # Apply filters if provided
-            if filters:
-                if filters.get('category') and crop['category'] != filters['category']:
-                    continue
-                if filters.get('region') and filters['region'].lower() not in crop['region'].lower():
-                    continue
-                if filters.get('max_price') and crop['price_per_kg'] > filters['max_price']:
-                    continue
-                if filters.get('min_price') and crop['price_per_kg'] < filters['min_price']:
-                    continue
-                if filters.get('season') and crop['season'] != filters['season'] and crop['season'] != 'year-round':
-                    continue
-            
-            results.append(crop)
+    for crop in candidates:
+        # Apply filters if provided
+        if filters:
+            if filters.get('category') and crop['category'] != filters['category']:
+                continue
+            if filters.get('region') and filters['region'].lower() not in crop['region'].lower():
+                continue
+            if filters.get('max_price') and crop['price_per_kg'] > filters['max_price']:
+                continue
+            if filters.get('min_price') and crop['price_per_kg'] < filters['min_price']:
+                continue
+            if filters.get('season') and crop['season'] != filters['season'] and crop['season'] != 'year-round':
+                continue
+        
+        results.append(crop)
     
-    return results
+    result_cache.set(key, results)
+    return list(results)
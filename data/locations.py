@@ -390,6 +390,26 @@ def get_location_coordinates(location):
     
     return coordinates_map.get(location, (0, 0))
 
+def find_coordinates(location):
+    """Get coordinates for a location, falling back to a known city in the same country.
+
+    Accepts 'City, Country' or just a country name; returns None when nothing matches.
+    """
+    if not location:
+        return None
+
+    coordinates = get_location_coordinates(location)
+    if coordinates != (0, 0):
+        return coordinates
+
+    country = location.split(',')[-1].strip().lower()
+    for known in get_market_centers() + AFRICAN_LOCATIONS:
+        if known.split(',')[-1].strip().lower() == country:
+            coordinates = get_location_coordinates(known)
+            if coordinates != (0, 0):
+                return coordinates
+    return None
+
 def get_market_centers():
     """Get major agricultural market centers"""
     return [
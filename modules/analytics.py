@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
 from utils.translations import get_translation
+from utils.ranking import top_k
+from utils.catalog import count_products
 from data.crops import AFRICAN_CROPS, CROP_CATEGORIES
 from data.locations import AFRICAN_LOCATIONS
 
@@ -42,7 +44,8 @@ def display_market_overview():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Products", "15,672", "+3.2%")
+        # Live count of listings buyers can order now
+        st.metric("Total Products", f"{count_products({'available': True}):,}")
     with col2:
         st.metric("Active Farmers", "2,543", "+5.1%")
     with col3:
@@ -104,8 +107,8 @@ def display_market_overview():
     # Top performing products
     st.subheader("🏆 Top Performing Products")
     
-    # Sort crops by price (as a proxy for performance)
-    top_crops = sorted(AFRICAN_CROPS, key=lambda x: x['price_per_kg'], reverse=True)[:10]
+    # Highest priced crops (as a proxy for performance)
+    top_crops = top_k(AFRICAN_CROPS, 10, key=lambda x: -x['price_per_kg'])
     
     performance_data = []
     for i, crop in enumerate(top_crops):
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils.database import get_all_products, add_product
+from utils.catalog import query_products, facet_counts, filter_signature, DEFAULT_PAGE_SIZE
 from utils.recommendations import get_product_recommendations
-from utils.translations import get_translation
+from utils.translations import get_translation, get_crop_name
+from utils.thumbnails import get_thumbnail
 from data.crops import AFRICAN_CROPS, CROP_CATEGORIES, search_crops
 
 def marketplace_page():
@@ -45,7 +46,7 @@ def marketplace_page():
                     get_translation("rating", st.session_state.language),
                     get_translation("price_low_high", st.session_state.language),
                     get_translation("price_high_low", st.session_state.language),
-                    "Distance"
+                    get_translation("distance", st.session_state.language)
                 ]
             )
 
@@ -54,53 +55,45 @@ def marketplace_page():
             fresh_only = st.checkbox("🆕 Fresh Harvest", key="filter_fresh_only")
 
 
-    # Get products
-    products = get_all_products()
-
-    # Apply filters
-    filtered_products = []
-    for product in products:
-        # Search filter
-        if search_query:
-            if not (search_query.lower() in product['name'].lower() or
-                   search_query.lower() in product['description'].lower()):
-                continue
-
-        # Category filter
-        if category_filter != "All" and product['category'] != category_filter:
-            continue
-
-        # Price filter
-        if not (min_price <= product['price'] <= max_price):
-            continue
+    # Map the translated sort labels to query sort keys
+    sort_keys = {
+        get_translation("rating", st.session_state.language): 'rating',
+        get_translation("price_low_high", st.session_state.language): 'price_asc',
+        get_translation("price_high_low", st.session_state.language): 'price_desc',
+        get_translation("distance", st.session_state.language): 'distance'
+    }
+    sort = sort_keys.get(sort_option)
+
+    filters = {
+        'search': search_query,
+        'category': category_filter,
+        'min_price': min_price,
+        'max_price': max_price,
+        'organic': organic_only,
+        'fresh': fresh_only,
+        'available': True
+    }
+    if sort == 'distance' and st.session_state.user:
+        # Distance is measured from the buyer's profile location
+        filters['origin'] = st.session_state.user.get('location')
 
-        # Organic filter
-        if organic_only and not product.get('organic', False):
-            continue
+    display_facets(facet_counts(filters))
 
-        filtered_products.append(product)
+    # Keep a stack of page cursors; start over whenever the query changes
+    signature = filter_signature(filters, sort)
+    if st.session_state.get('marketplace_query') != signature:
+        st.session_state.marketplace_query = signature
+        st.session_state.marketplace_cursors = [None]
 
-    # Sort products
-    if sort_option == get_translation("price_low_high", st.session_state.language):
-        filtered_products.sort(key=lambda x: x['price'])
-    elif sort_option == get_translation("price_high_low", st.session_state.language):
-        filtered_products.sort(key=lambda x: x['price'], reverse=True)
-    elif sort_option == get_translation("rating", st.session_state.language):
-        filtered_products.sort(key=lambda x: x['rating'], reverse=True)
+    cursors = st.session_state.marketplace_cursors
+    page = query_products(filters, sort=sort, limit=DEFAULT_PAGE_SIZE, cursor=cursors[-1])
 
     # Display results count
-    st.write(f"**{len(filtered_products)} {get_translation('products_found', st.session_state.language)}**")
-
-    # Display products in grid
-    if filtered_products:
-        # Create product grid
-        cols_per_row = 3
-        for i in range(0, len(filtered_products), cols_per_row):
-            cols = st.columns(cols_per_row)
-
-            for j, product in enumerate(filtered_products[i:i+cols_per_row]):
-                with cols[j]:
-                    display_product_card(product)
+    st.write(f"**{page['total']} {get_translation('products_found', st.session_state.language)}**")
+
+    # Display the current page of products in a grid
+    if page['items']:
+        display_product_grid(page['items'], len(cursors), page['total'], page['next_cursor'])
     else:
         st.info("No products found matching your criteria. Try adjusting your filters.")
 
@@ -115,11 +108,91 @@ def marketplace_page():
                 with rec_cols[i % 3]:
                     display_recommendation_card(rec_product)
 
+@st.fragment
+def display_product_grid(items, page_number, total, next_cursor):
+    """Product cards of the current page, rerun on their own for cart actions.
+
+    A click inside the fragment reruns only the fragment, with the page
+    items from the last full run, so adding to the cart re-renders one page
+    of cards without reloading, refiltering or resorting the catalog.
+    """
+    if st.session_state.user and st.session_state.user.get('type') != 'farmer':
+        display_cart_summary()
+
+    cols_per_row = 3
+    for i in range(0, len(items), cols_per_row):
+        cols = st.columns(cols_per_row)
+
+        for j, product in enumerate(items[i:i+cols_per_row]):
+            with cols[j]:
+                display_product_card(product)
+
+    display_pagination(page_number, total, next_cursor)
+
+@st.fragment
+def display_cart_summary():
+    """Compact cart widget, a nested fragment so clearing the cart reruns only this widget"""
+
+    notice = st.session_state.pop('cart_notice', None)
+    if notice:
+        st.toast(notice)
+
+    cart = st.session_state.cart
+    if not cart:
+        st.caption(f"🛒 {get_translation('cart_empty', st.session_state.language)}")
+        return
+
+    summary_col, clear_col = st.columns([3, 1])
+    with summary_col:
+        quantity = sum(item['quantity'] for item in cart)
+        total = sum(item['total'] for item in cart)
+        st.caption(f"🛒 {len(cart)} products · {quantity} kg · ${total:.2f}")
+
+    with clear_col:
+        st.button("Clear cart", key="cart_clear", on_click=clear_cart)
+
+def display_facets(facets):
+    """Product counts per category, location and organic flag for the current filters"""
+
+    def summary(counts, limit=6):
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        return " · ".join(f"{name} ({count})" for name, count in ranked[:limit]) or "—"
+
+    category_col, location_col, organic_col = st.columns([2, 2, 1])
+
+    with category_col:
+        st.caption(f"**{get_translation('category', st.session_state.language)}:** {summary(facets['category'])}")
+
+    with location_col:
+        st.caption(f"**{get_translation('location', st.session_state.language)}:** {summary(facets['location'])}")
+
+    with organic_col:
+        st.caption(f"🌱 {facets['organic'][True]} · {facets['organic'][False]} non-organic")
+
+def display_pagination(page_number, total, next_cursor):
+    """Previous/next controls for the marketplace product grid"""
+
+    total_pages = max(1, -(-total // DEFAULT_PAGE_SIZE))
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+
+    with prev_col:
+        if st.button("◀ Previous", key="page_prev", disabled=page_number <= 1):
+            st.session_state.marketplace_cursors.pop()
+            st.rerun()
+
+    with page_col:
+        st.write(f"Page {page_number} / {total_pages}")
+
+    with next_col:
+        if st.button("Next ▶", key="page_next", disabled=next_cursor is None):
+            st.session_state.marketplace_cursors.append(next_cursor)
+            st.rerun()
+
 def display_product_card(product):
     """Display a product card with details and actions"""
 
-    # Product image placeholder
-    st.image(product.get('image_url', f"https://via.placeholder.com/250x200?text={product['name']}"))
+    # Product image from the local thumbnail cache (only cards on the visible page get here)
+    st.image(get_thumbnail(product.get('image_url'), (250, 200), product['name']))
 
     # Product title and rating
     st.write(f"**{product['name']}**")
@@ -140,7 +213,7 @@ def display_product_card(product):
 
     # Add to cart section
     if st.session_state.user and st.session_state.user.get('type') != 'farmer':
-        quantity = st.number_input(
+        st.number_input(
             get_translation("quantity", st.session_state.language),
             min_value=1,
             max_value=min(100, product['quantity']),
@@ -150,8 +223,13 @@ def display_product_card(product):
 
         col1, col2 = st.columns(2)
         with col1:
-            if st.button(get_translation("add_to_cart", st.session_state.language), key=f"cart_{product['id']}"):
-                add_to_cart(product, quantity)
+            # Runs as a callback before the grid fragment reruns, so the cart widget is current
+            st.button(
+                get_translation("add_to_cart", st.session_state.language),
+                key=f"cart_{product['id']}",
+                on_click=add_to_cart_from_input,
+                args=(product, f"qty_{product['id']}")
+            )
 
         with col2:
             if st.button(get_translation("contact_farmer", st.session_state.language), key=f"contact_{product['id']}"):
@@ -163,8 +241,9 @@ def display_recommendation_card(crop_data):
     """Display a recommendation card for crops from the database"""
 
     # Create a product-like structure from crop data
-    st.image(f"https://via.placeholder.com/200x150?text={crop_data['name']}")
-    st.write(f"**{crop_data['name']}**")
+    st.image(get_thumbnail(f"https://via.placeholder.com/200x150?text={crop_data['name']}", (200, 150), crop_data['name']))
+    local_name = get_crop_name(crop_data['name'], st.session_state.language)
+    st.write(f"**{local_name}**" if local_name == crop_data['name'] else f"**{local_name}** ({crop_data['name']})")
     st.write(f"💰 ${crop_data['price_per_kg']:.2f}/kg")
     st.write(f"📍 {crop_data['region']}")
     st.write(f"🌾 {crop_data['category']}")
@@ -200,8 +279,16 @@ def add_to_cart(product, quantity):
         # Add new item
         st.session_state.cart.append(cart_item)
 
-    st.success(get_translation("added_to_cart", st.session_state.language))
-    st.rerun()
+    # Shown by the cart widget; callbacks should not draw elements themselves
+    st.session_state.cart_notice = get_translation("added_to_cart", st.session_state.language)
+
+def add_to_cart_from_input(product, quantity_key):
+    """Add to cart callback reading the quantity from the card's number input"""
+    add_to_cart(product, st.session_state.get(quantity_key, 1))
+
+def clear_cart():
+    """Empty the shopping cart"""
+    st.session_state.cart = []
 
 def contact_farmer(product):
     """Open contact form for farmer"""
@@ -219,7 +306,7 @@ def product_detail_view(product):
     col1, col2 = st.columns([1, 1])
 
     with col1:
-        st.image(product.get('image_url', f"https://via.placeholder.com/400x300?text={product['name']}"))
+        st.image(get_thumbnail(product.get('image_url'), (400, 300), product['name']))
 
     with col2:
         st.write(f"**Price:** ${product['price']:.2f}/kg")
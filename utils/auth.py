@@ -1,7 +1,7 @@
 import hashlib
-import json
-import os
 from datetime import datetime
+from utils.bulk_io import parse_bool
+from utils.storage import get_backend
 
 def hash_password(password):
     """Hash password using SHA256"""
@@ -9,14 +9,13 @@ def hash_password(password):
 
 def authenticate_user(email, password):
     """Authenticate user with email and password"""
-    users_file = "data/users.json"
+    backend = get_backend()
     
-    if not os.path.exists(users_file):
+    if not backend.exists('users'):
         return None
     
     try:
-        with open(users_file, 'r') as f:
-            users = json.load(f)
+        users = backend.find('users', ['email'], email)
     except:
         return None
     
@@ -38,28 +37,9 @@ def authenticate_user(email, password):
 
 def create_user(name, email, phone, password, user_type, location):
     """Create a new user account"""
-    users_file = "data/users.json"
     
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
-    
-    # Load existing users or create empty list
-    users = []
-    if os.path.exists(users_file):
-        try:
-            with open(users_file, 'r') as f:
-                users = json.load(f)
-        except:
-            users = []
-    
-    # Check if email already exists
-    for user in users:
-        if user['email'] == email:
-            return None  # Email already exists
-    
-    # Create new user
+    # Create new user (the storage backend assigns the id)
     new_user = {
-        'id': len(users) + 1,
         'name': name,
         'email': email,
         'phone': phone,
@@ -72,12 +52,11 @@ def create_user(name, email, phone, password, user_type, location):
         'total_transactions': 0
     }
     
-    users.append(new_user)
-    
-    # Save to file
+    # Save to storage; the email check and insert happen under one lock
     try:
-        with open(users_file, 'w') as f:
-            json.dump(users, f, indent=2)
+        new_user = get_backend().insert('users', new_user, unique='email')
+        if new_user is None:
+            return None  # Email already exists
         
         return {
             'id': new_user['id'],
@@ -91,50 +70,95 @@ def create_user(name, email, phone, password, user_type, location):
     except:
         return None
 
+def bulk_create_users(users, hashed_passwords=False):
+    """Validate and create many user accounts in a single write.
+
+    Rows need name, email, phone, password, type and location. Nothing is
+    saved if any row is invalid; emails that are already registered are
+    skipped. With hashed_passwords, passwords are stored as given, so a
+    users export can be restored; its created_at, verified, rating and
+    total_transactions are kept too.
+    """
+    new_users = []
+    errors = []
+    for row_number, user_data in enumerate(users, start=1):
+        missing = [field for field in ['name', 'email', 'phone', 'password', 'type', 'location'] if not user_data.get(field)]
+        if missing:
+            errors.append({'row': row_number, 'error': f"Missing {', '.join(missing)}"})
+            continue
+
+        try:
+            new_users.append({
+                'name': user_data['name'],
+                'email': user_data['email'],
+                'phone': str(user_data['phone']),
+                'password': user_data['password'] if hashed_passwords else hash_password(user_data['password']),
+                'type': user_data['type'],
+                'location': user_data['location'],
+                'created_at': user_data.get('created_at') or datetime.now().isoformat(),
+                'verified': parse_bool(user_data.get('verified', False)),
+                'rating': float(user_data.get('rating') or 0),
+                'total_transactions': int(float(user_data.get('total_transactions') or 0))
+            })
+        except (TypeError, ValueError):
+            errors.append({'row': row_number, 'error': "Rating and total_transactions must be numbers"})
+
+    if errors:
+        return {
+            'success': False,
+            'message': f'{len(errors)} invalid rows, no users were created',
+            'inserted': 0,
+            'skipped': 0,
+            'errors': errors
+        }
+
+    try:
+        inserted = get_backend().insert_many('users', new_users, unique='email')
+    except:
+        return {
+            'success': False,
+            'message': 'Users could not be saved',
+            'inserted': 0,
+            'skipped': 0,
+            'errors': []
+        }
+
+    return {
+        'success': True,
+        'message': f'{len(inserted)} users created',
+        'inserted': len(inserted),
+        'skipped': len(new_users) - len(inserted),
+        'errors': []
+    }
+
 def get_user_by_email(email):
     """Get user information by email"""
-    users_file = "data/users.json"
+    backend = get_backend()
     
-    if not os.path.exists(users_file):
+    if not backend.exists('users'):
         return None
     
     try:
-        with open(users_file, 'r') as f:
-            users = json.load(f)
+        users = backend.find('users', ['email'], email)
     except:
         return None
     
-    for user in users:
-        if user['email'] == email:
-            return user
-    
-    return None
+    return users[0] if users else None
 
 def update_user_profile(email, updates):
     """Update user profile information"""
-    users_file = "data/users.json"
+    backend = get_backend()
     
-    if not os.path.exists(users_file):
+    if not backend.exists('users'):
         return False
     
+    def apply_updates(user):
+        for key, value in updates.items():
+            if key in user and key != 'id' and key != 'email' and key != 'password':
+                user[key] = value
+    
+    # Read-modify-write happens under the store's lock
     try:
-        with open(users_file, 'r') as f:
-            users = json.load(f)
+        return backend.update('users', 'email', email, apply_updates)
     except:
         return False
-    
-    for i, user in enumerate(users):
-        if user['email'] == email:
-            for key, value in updates.items():
-                if key in user and key != 'id' and key != 'email' and key != 'password':
-                    users[i][key] = value
-            
-            # Save updated users
-            try:
-                with open(users_file, 'w') as f:
-                    json.dump(users, f, indent=2)
-                return True
-            except:
-                return False
-    
-    return False
@@ -0,0 +1,87 @@
+# Offline job that precomputes every user's recommendations into the
+# 'recommendations' collection, one row per email, so page loads read a row
+# instead of computing it. Reruns only refresh users whose fingerprint
+# (location, type, purchases, day) changed; --full recomputes everyone.
+#
+#   python -m utils.batch_recommendations
+#   python -m utils.batch_recommendations --workers 8 --full
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from utils.collaborative import get_item_similarity
+from utils.recommendations import build_product_recommendations, build_recommendations, recommendation_fingerprint
+from utils.storage import get_backend
+
+# Users handed to a worker process per task
+CHUNK_SIZE = 200
+
+def compute_rows(users):
+    """Compute the recommendation rows of a list of users (runs in a worker process)"""
+    model = get_item_similarity(wait=True)
+    generated_at = datetime.now().isoformat()
+    rows = []
+    for user in users:
+        rows.append({
+            'email': user['email'],
+            'fingerprint': recommendation_fingerprint(user, model),
+            'tips': build_recommendations(user),
+            'products': [crop['name'] for crop in build_product_recommendations(user, model=model)],
+            'generated_at': generated_at
+        })
+    return rows
+
+def run_batch(workers=None, full=False, chunk_size=CHUNK_SIZE):
+    """Refresh stale recommendation rows for every user and write them in one go.
+
+    Returns counts of users seen, rows refreshed and rows kept.
+    """
+    backend = get_backend()
+    users = backend.load_all('users') if backend.exists('users') else []
+    existing = {}
+    if backend.exists('recommendations'):
+        existing = {row['email']: row for row in backend.load_all('recommendations')}
+
+    model = get_item_similarity(backend, wait=True)
+    stale = []
+    for user in users:
+        if not user.get('email'):
+            continue
+        row = existing.get(user['email'])
+        if full or row is None or row.get('fingerprint') != recommendation_fingerprint(user, model):
+            # Passwords never leave this process
+            stale.append({k: v for k, v in user.items() if k != 'password'})
+
+    refreshed = {}
+    if stale:
+        chunks = [stale[i:i + chunk_size] for i in range(0, len(stale), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rows in pool.map(compute_rows, chunks):
+                for row in rows:
+                    refreshed[row['email']] = row
+
+    # Rows of deleted users are dropped; unchanged rows are carried over
+    emails = [user['email'] for user in users if user.get('email')]
+    rows = [refreshed.get(email) or existing[email] for email in dict.fromkeys(emails)]
+    if refreshed or len(rows) != len(existing):
+        backend.replace_all('recommendations', rows)
+
+    return {'users': len(emails), 'refreshed': len(refreshed), 'kept': len(rows) - len(refreshed)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute recommendations for every user")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--full', action='store_true', help="recompute every user, not just changed ones")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run_batch(args.workers, args.full, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"{result['users']} users: {result['refreshed']} refreshed, {result['kept']} unchanged in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Set bits of every byte value; np.bitwise_count needs NumPy 2.0
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], np.uint8)
+
+class BitmapIndex:
+    """Packed bitmaps per value of low-cardinality columns.
+
+    Each (field, value) pair maps to a NumPy uint8 array with one bit per
+    row (little-endian bit order), so combining filters is a bytewise
+    AND/OR over size/8 bytes. Rows are appended with extend(); only the
+    trailing partial byte of existing bitmaps is rewritten.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.size = 0
+        self.bitmaps = {field: {} for field in fields}
+
+    def extend(self, columns):
+        """Append rows given as {field: array of values}, one array per indexed field"""
+        count = len(next(iter(columns.values()))) if columns else 0
+        if not count:
+            return
+
+        # Re-pack from the last byte boundary so a partial byte is completed
+        start = (self.size // 8) * 8
+        new_size = self.size + count
+        for field in self.fields:
+            values = np.asarray(columns[field])
+            bitmaps = self.bitmaps[field]
+            tails = {}
+            if start < self.size:
+                tails = self._tail_values(field, start)
+
+            for value in set(np.unique(values).tolist()) | set(bitmaps):
+                tail = tails.get(value, np.zeros(self.size - start, bool))
+                rows = np.concatenate([tail, values == value])
+                head = bitmaps.get(value, np.zeros(0, np.uint8))[:start // 8]
+                if len(head) < start // 8:
+                    head = np.concatenate([head, np.zeros(start // 8 - len(head), np.uint8)])
+                bitmaps[value] = np.concatenate([head, np.packbits(rows, bitorder='little')])
+        self.size = new_size
+
+    def _tail_values(self, field, start):
+        """Unpack the rows from start to the current size for every value of a field"""
+        return {
+            value: np.unpackbits(bits[start // 8:], count=self.size - start, bitorder='little').astype(bool)
+            for value, bits in self.bitmaps[field].items()
+        }
+
+    def empty(self):
+        """Get a bitmap with no rows set"""
+        return np.zeros((self.size + 7) // 8, np.uint8)
+
+    def get(self, field, value):
+        """Get the bitmap of rows where field equals value"""
+        bits = self.bitmaps[field].get(value)
+        return bits if bits is not None else self.empty()
+
+    def any_of(self, field, values):
+        """Get the bitmap of rows where field equals any of values"""
+        result = self.empty()
+        for value in values:
+            bits = self.bitmaps[field].get(value)
+            if bits is not None:
+                result |= bits
+        return result
+
+    def count(self, bits):
+        """Count the rows set in a bitmap"""
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    def to_mask(self, bits):
+        """Expand a bitmap to a boolean array with one entry per row"""
+        return np.unpackbits(bits, count=self.size, bitorder='little').astype(bool)
+
+    def from_mask(self, mask):
+        """Pack a boolean array with one entry per row into a bitmap"""
+        return np.packbits(mask, bitorder='little')
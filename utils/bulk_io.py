@@ -0,0 +1,111 @@
+# Bulk import and backup export of the data stores
+#
+#   python -m utils.bulk_io import products cooperative.csv
+#   python -m utils.bulk_io import users members.jsonl
+#   python -m utils.bulk_io import users backup/users.jsonl --hashed-passwords
+#   python -m utils.bulk_io export products backup/products.jsonl
+
+import argparse
+import csv
+import json
+import os
+from contextlib import contextmanager
+from utils.serializers import dumps_compact, loads_json
+from utils.storage import get_backend
+
+def parse_bool(value):
+    """Read a boolean that may come back from CSV as text"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 'yes', '1')
+    return bool(value)
+
+def detect_format(path):
+    """Get 'csv' or 'jsonl' from a file extension"""
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+@contextmanager
+def _open_text(source, mode):
+    """Open a path, or pass through an already open text file"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode, newline='', encoding='utf-8') as f:
+            yield f
+    else:
+        yield source
+
+def read_records(source, fmt=None):
+    """Stream records one at a time from a CSV or JSON-Lines file"""
+    fmt = fmt or detect_format(str(source) if isinstance(source, (str, os.PathLike)) else '')
+
+    with _open_text(source, 'r') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield loads_json(line)
+
+def export_collection(collection, destination, fmt=None):
+    """Stream every record of a collection to a CSV or JSON-Lines backup file.
+
+    Returns the number of records written.
+    """
+    backend = get_backend()
+    fmt = fmt or detect_format(str(destination) if isinstance(destination, (str, os.PathLike)) else '')
+    count = 0
+
+    with _open_text(destination, 'w') as f:
+        if fmt == 'csv':
+            # First pass collects the columns so records are never all in memory
+            fieldnames = {}
+            for record in backend.iter_all(collection):
+                fieldnames.update(dict.fromkeys(record))
+
+            writer = csv.DictWriter(f, fieldnames=list(fieldnames))
+            writer.writeheader()
+            for record in backend.iter_all(collection):
+                writer.writerow({
+                    key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for key, value in record.items()
+                })
+                count += 1
+        else:
+            for record in backend.iter_all(collection):
+                f.write(dumps_compact(record).decode() + "\n")
+                count += 1
+
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import and export for Sama AgroLink data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Import products or users from CSV/JSONL")
+    import_parser.add_argument('collection', choices=['products', 'users'])
+    import_parser.add_argument('path')
+    import_parser.add_argument('--hashed-passwords', action='store_true',
+                               help="passwords in the file are already hashed (restoring a users export)")
+
+    export_parser = subparsers.add_parser('export', help="Export a collection to CSV/JSONL")
+    export_parser.add_argument('collection')
+    export_parser.add_argument('path')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        if args.collection == 'products':
+            from utils.database import bulk_add_products
+            result = bulk_add_products(read_records(args.path))
+        else:
+            from utils.auth import bulk_create_users
+            result = bulk_create_users(read_records(args.path), hashed_passwords=args.hashed_passwords)
+
+        print(result['message'])
+        for error in result['errors']:
+            print(f"  row {error['row']}: {error['error']}")
+    else:
+        count = export_collection(args.collection, args.path)
+        print(f"Exported {count} {args.collection} records to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Get a cached value, counting the lookup as a hit or a miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """Get a cached value without touching the hit/miss counters"""
+        with self._lock:
+            value = self._lookup(key)
+            return default if value is _MISSING else value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries past maxsize"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _lookup(self, key):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+# Shared cache of query results (marketplace pages, crop searches) for every
+# session. Keys carry the normalized query, the filter signature and the data
+# version, so a catalog write makes the next lookup miss; the TTL bounds how
+# stale time-based filters such as Fresh Harvest can get.
+result_cache = LRUCache(
+    maxsize=int(os.getenv("SAMA_RESULT_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("SAMA_RESULT_CACHE_TTL", "60"))
+)
@@ -0,0 +1,255 @@
+import base64
+import hashlib
+import json
+import threading
+import numpy as np
+from data.locations import find_coordinates
+from utils.columns import CatalogColumns, SORT_COLUMNS, keyset_after
+from utils.ranking import top_k_rows
+from utils.cache import LRUCache, result_cache
+from utils.database import get_all_products, load_indexed
+from utils.search import InvertedIndex, normalize_query
+from utils.storage import get_backend
+from utils.translations import get_crop_synonyms
+
+DEFAULT_PAGE_SIZE = 12
+
+# Indexed product fields and their BM25 weights
+SEARCH_FIELDS = {'name': 3.0, 'category': 1.5, 'location': 1.0, 'description': 1.0}
+
+# Guards the cached columns and search index. Queries hold it while they
+# catch both up to one snapshot of the catalog length and read them, since
+# insert_records grows the shared list without it.
+_catalog_lock = threading.RLock()
+_search_state = {'products': None, 'indexed': 0, 'index': None}
+_columns_state = {'products': None, 'columns': None}
+
+# A catalog too large for the RecordIndex cache, kept so the columns and
+# search index above are extended rather than rebuilt on every query
+_catalog_snapshot = {'key': None, 'cursor': None, 'products': None}
+
+# Facet counts per filter signature; the TTL keeps 'fresh' counts current
+_facet_cache = LRUCache(maxsize=256, ttl=60)
+
+def get_catalog_columns(products, size=None):
+    """Get the columnar view of the first size products (default all), adding columns for new ones.
+
+    Callers that go on reading the columns should hold _catalog_lock.
+    """
+    size = len(products) if size is None else size
+    with _catalog_lock:
+        columns = _columns_state['columns']
+        if _columns_state['products'] is not products or columns.size > size:
+            columns = CatalogColumns(products, size)
+            _columns_state['products'] = products
+            _columns_state['columns'] = columns
+        else:
+            columns.extend(size)
+        return columns
+
+def get_search_index(products, size=None):
+    """Get the full-text index for the first size products (default all), indexing any new ones.
+
+    The cached catalog list only grows in place as products are inserted, so
+    the index catches up incrementally; any other list is indexed afresh.
+    Document ids are positions in the list. Callers that go on searching
+    should hold _catalog_lock.
+    """
+    size = len(products) if size is None else size
+    with _catalog_lock:
+        if _search_state['products'] is not products or _search_state['indexed'] > size:
+            _search_state['products'] = products
+            _search_state['indexed'] = 0
+            _search_state['index'] = InvertedIndex(SEARCH_FIELDS, synonyms=get_crop_synonyms())
+
+        index = _search_state['index']
+        for position in range(_search_state['indexed'], size):
+            index.add(position, products[position])
+        index.prepare()
+        _search_state['indexed'] = size
+        return index
+
+def _load_products():
+    """Get the catalog list, creating the sample catalog on first use.
+
+    The cached RecordIndex list grows in place as products are inserted. A
+    catalog too large for that cache is kept in _catalog_snapshot instead,
+    keyed on the storage version and extended in place with only the
+    products written since; a rewritten store replaces it.
+    """
+    backend = get_backend()
+    if not backend.exists('products'):
+        get_all_products()
+    index = load_indexed('products', backend)
+    if index is not None:
+        return index.records
+
+    key = (backend.name, backend.version('products'))
+    with _catalog_lock:
+        snapshot = _catalog_snapshot
+        if snapshot['key'] != key:
+            same_store = snapshot['key'] is not None and snapshot['key'][0] == backend.name
+            records, cursor, reset = backend.read_after('products', snapshot['cursor'] if same_store else None)
+            if reset:
+                snapshot['products'] = records
+            else:
+                snapshot['products'].extend(records)
+            snapshot['key'] = key
+            snapshot['cursor'] = cursor
+        return snapshot['products']
+
+def _search_matches(filters, products, size):
+    """Get {position: score} for the search filter over the first size products, or None without one"""
+    if not filters.get('search'):
+        return None
+    return get_search_index(products, size).search(filters['search'])
+
+def _positions_mask(positions, size):
+    """Get a boolean array that is True at the given positions"""
+    mask = np.zeros(size, bool)
+    if positions:
+        mask[np.fromiter(positions, np.int64, len(positions))] = True
+    return mask
+
+def facet_counts(filters=None, products=None):
+    """Get product counts per category, location and organic flag for a query.
+
+    Returns {'category': {name: count}, 'location': {name: count},
+    'organic': {True: count, False: count}}. Each facet ignores its own
+    filter, so buyers see how many products another choice would show.
+    Results are cached per filter signature until the catalog changes.
+    """
+    filters = filters or {}
+    if products is None:
+        products = _load_products()
+
+    with _catalog_lock:
+        size = len(products)
+        columns = get_catalog_columns(products, size)
+
+        key = (id(columns), len(columns), filter_signature(filters))
+        facets = _facet_cache.get(key)
+        if facets is None:
+            mask = columns.mask(filters, exclude=('category', 'organic'))
+            matches = _search_matches(filters, products, size)
+            if matches is not None:
+                mask &= _positions_mask(matches, size)
+            facets = columns.facets(mask, filters)
+            _facet_cache.set(key, facets)
+    return facets
+
+def count_products(filters=None, products=None):
+    """Count products matching the category, location, organic and available filters.
+
+    Answered with bitmap popcounts, without building a row mask.
+    """
+    if products is None:
+        products = _load_products()
+    with _catalog_lock:
+        columns = get_catalog_columns(products)
+        bits = columns.filter_bits(filters or {})
+        return len(columns) if bits is None else columns.bitmaps.count(bits)
+
+def filter_signature(filters, sort=None):
+    """Get a stable short hash of a query's filters and sort order"""
+    raw = json.dumps({'filters': filters or {}, 'sort': sort}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def encode_cursor(signature, last_key):
+    """Build an opaque cursor pointing just after last_key"""
+    raw = json.dumps([signature, list(last_key)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor, signature):
+    """Get the sort key a cursor points after, or None if it belongs to another query"""
+    try:
+        cursor_signature, last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if cursor_signature != signature:
+        return None
+    return tuple(last_key)
+
+def query_products(filters=None, sort=None, limit=DEFAULT_PAGE_SIZE, cursor=None, products=None):
+    """Get one page of products matching filters, in sort order.
+
+    Supported filters: search, category, location, min_price, max_price,
+    organic, available and fresh. Returns {'items', 'total', 'next_cursor'}. Pass next_cursor back
+    to get the following page; it is None on the last page. Cursors are
+    keyset based, so products added between pages do not shift or repeat
+    results. A search without an explicit sort is ordered by relevance,
+    which moves as products are indexed, so its cursors only hold at the
+    catalog size they were taken at; after an insert such a cursor is
+    ignored and the first page is returned again. The 'distance' sort orders from the location in filters['origin'], falling
+    back to the default order when it is unknown. Pages of the live catalog
+    are served from the shared result cache until the catalog changes.
+    """
+    filters = dict(filters or {})
+    if filters.get('search'):
+        filters['search'] = normalize_query(filters['search'])
+    if sort not in SORT_COLUMNS:
+        sort = None
+    signature = filter_signature(filters, sort)
+
+    # Queries on the live catalog go through the shared result cache
+    if products is None:
+        backend = get_backend()
+        key = ('products', signature, cursor, limit, backend.name, backend.version('products'))
+        page = result_cache.get(key)
+        if page is None:
+            page = _query_page(filters, sort, limit, cursor, signature, _load_products())
+            result_cache.set(key, page)
+        return {**page, 'items': list(page['items'])}
+
+    return _query_page(filters, sort, limit, cursor, signature, products)
+
+def _query_page(filters, sort, limit, cursor, signature, products):
+    """Run a product query against a product list"""
+    # Columns and search index are caught up to the same length and read
+    # without another query extending them in between
+    with _catalog_lock:
+        return _query_snapshot(filters, sort, limit, cursor, signature, products, len(products))
+
+def _query_snapshot(filters, sort, limit, cursor, signature, products, size):
+    """Run a product query against the first size products (caller holds _catalog_lock)"""
+    columns = get_catalog_columns(products, size)
+
+    mask = columns.mask(filters)
+    scores = None
+    matches = _search_matches(filters, products, size)
+    if matches is not None:
+        mask &= _positions_mask(matches, size)
+        if sort is None:
+            scores = np.zeros(size)
+            for position, score in matches.items():
+                scores[position] = score
+
+    origin = find_coordinates(filters.get('origin')) if sort == 'distance' else None
+    if origin is not None:
+        positions, keys = columns.order_by_distance(mask, origin)
+    else:
+        positions, keys = columns.select(mask, None if sort == 'distance' else sort, scores)
+    total = len(positions)
+
+    if scores is not None:
+        # BM25 scores change with every indexed product, so relevance keys
+        # from another catalog size would skip or repeat rows
+        signature = f"{signature}@{size}"
+    last_key = decode_cursor(cursor, signature) if cursor else None
+    if last_key is not None and total:
+        after = keyset_after(keys, last_key)
+        positions = positions[after]
+        keys = [column[after] for column in keys]
+
+    # Only the rows that make this page are fully sorted
+    top = top_k_rows(keys, limit)
+    items = [products[position] for position in positions[top]]
+    next_cursor = None
+    if len(positions) > limit:
+        next_cursor = encode_cursor(signature, [column[top[-1]].item() for column in keys])
+
+    return {
+        'items': items,
+        'total': total,
+        'next_cursor': next_cursor
+    }
@@ -0,0 +1,200 @@
+import heapq
+import math
+import threading
+from utils.storage import get_backend
+
+# Neighbours kept per item; lookups slice these precomputed lists
+MAX_NEIGHBORS = 50
+
+# Transaction states that do not count as a purchase
+IGNORED_STATUSES = {'failed', 'cancelled', 'refunded'}
+
+def item_key(name):
+    """Get the key a product name is tracked under"""
+    return (name or '').strip().lower()
+
+class ItemSimilarity:
+    """Item-item collaborative filtering over buyers' purchase histories.
+
+    The co-occurrence matrix is sparse and kept as a dict of dicts: for
+    every item, the other items bought by the same buyers and how many
+    buyers bought both. Similarity is cosine over buyer sets,
+    co(i, j) / sqrt(buyers(i) * buyers(j)).
+
+    add() is idempotent and touches only the items co-occurring with the
+    new purchase, so the model is updated in place as purchases arrive.
+    Each item's top MAX_NEIGHBORS neighbours are stored sorted, and only
+    items whose counts changed are re-ranked on the next lookup.
+    """
+
+    def __init__(self, max_neighbors=MAX_NEIGHBORS):
+        self.max_neighbors = max_neighbors
+        self.baskets = {}
+        self.buyers = {}
+        self.cooccurrence = {}
+        self._neighbors = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def add(self, user, item):
+        """Record that a user bought an item; repeat purchases change nothing"""
+        item = item_key(item)
+        if not user or not item:
+            return
+        with self._lock:
+            basket = self.baskets.setdefault(user, set())
+            if item in basket:
+                return
+            row = self.cooccurrence.setdefault(item, {})
+            for other in basket:
+                row[other] = row.get(other, 0) + 1
+                other_row = self.cooccurrence.setdefault(other, {})
+                other_row[item] = other_row.get(item, 0) + 1
+            basket.add(item)
+            self.buyers[item] = self.buyers.get(item, 0) + 1
+            # Every neighbour's score against item moved with buyers(item)
+            self._dirty.add(item)
+            self._dirty.update(row)
+
+    def add_transactions(self, transactions):
+        """Record the purchases in transaction records (buyer_email, product_name)"""
+        for record in transactions:
+            if record.get('status') not in IGNORED_STATUSES:
+                self.add(record.get('buyer_email'), record.get('product_name'))
+
+    def add_payment_logs(self, logs):
+        """Record the purchases in payment log entries that list their buyer and items"""
+        for record in logs:
+            if record.get('status', 'completed') in IGNORED_STATUSES:
+                continue
+            for name in record.get('items') or []:
+                self.add(record.get('buyer_email'), name)
+
+    def neighbors(self, item):
+        """Get [(other item, similarity)] of an item, most similar first"""
+        item = item_key(item)
+        with self._lock:
+            if item in self._dirty:
+                self._rank(item)
+            return self._neighbors.get(item, [])
+
+    def _rank(self, item):
+        """Re-rank one item's neighbours from its co-occurrence row"""
+        self._dirty.discard(item)
+        row = self.cooccurrence.get(item)
+        if not row:
+            self._neighbors.pop(item, None)
+            return
+        buyers = self.buyers[item]
+        scored = ((count / math.sqrt(buyers * self.buyers[other]), other) for other, count in row.items())
+        # Ties go to the alphabetically first item so results are stable
+        top = heapq.nsmallest(self.max_neighbors, scored, key=lambda pair: (-pair[0], pair[1]))
+        self._neighbors[item] = [(other, score) for score, other in top]
+
+    def similar(self, item, n=5):
+        """Get the n items most often bought together with an item"""
+        return [other for other, _ in self.neighbors(item)[:n]]
+
+    def recommend(self, user, n=5):
+        """Get n items a user has not bought, scored by similarity to what they bought"""
+        basket = self.baskets.get(user)
+        if not basket:
+            return []
+        scores = {}
+        for item in list(basket):
+            for other, score in self.neighbors(item):
+                if other not in basket:
+                    scores[other] = scores.get(other, 0.0) + score
+        return [item for item, _ in heapq.nsmallest(n, scores.items(), key=lambda pair: (-pair[1], pair[0]))]
+
+    def stats(self):
+        """Get the size of the model"""
+        return {
+            'users': len(self.baskets),
+            'items': len(self.buyers),
+            'pairs': sum(len(row) for row in self.cooccurrence.values()) // 2
+        }
+
+def build_item_similarity(transactions=(), payment_logs=()):
+    """Build a model in one pass over transaction records and payment logs"""
+    model = ItemSimilarity()
+    model.add_transactions(transactions)
+    model.add_payment_logs(payment_logs)
+    return model
+
+# Collections the shared model is built from
+SOURCES = ('transactions', 'payment_logs')
+
+# Process-wide model, caught up with storage by reading only new records
+_model = None
+_cursors = {}
+_versions = {}
+_model_lock = threading.Lock()
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+
+def _read_sources(backend, collections, cursors):
+    """Read collections past their cursors; get {collection: (records, cursor, reset)}"""
+    return {c: backend.read_after(c, cursors.get(c)) if backend.exists(c) else ([], None, False) for c in collections}
+
+def _refresh(backend):
+    """Catch the shared model up with storage and get it.
+
+    Only the records written since the last refresh are read. When a
+    collection was rewritten (or its log compacted) a new model is built
+    from every record and swapped in, so readers never see a half-built one.
+    """
+    global _model
+    with _model_lock:
+        # Versions are taken first so a write landing mid-read triggers another refresh
+        versions = {c: backend.version(c) for c in SOURCES}
+        if _model is not None and versions == _versions:
+            return _model
+
+        changed = SOURCES if _model is None else [c for c in SOURCES if versions[c] != _versions.get(c)]
+        reads = _read_sources(backend, changed, _cursors)
+        if _model is None or any(reset for _, _, reset in reads.values()):
+            reads = _read_sources(backend, SOURCES, {})
+            model = ItemSimilarity()
+        else:
+            model = _model
+
+        model.add_transactions(reads.get('transactions', ([],))[0])
+        model.add_payment_logs(reads.get('payment_logs', ([],))[0])
+        for collection, (_, cursor, _) in reads.items():
+            _cursors[collection] = cursor
+        _versions.update(versions)
+        _model = model
+        return model
+
+def _refresh_quietly(backend):
+    """Refresh in the background; on failure the current model keeps serving"""
+    try:
+        _refresh(backend)
+    except:
+        pass
+
+def get_item_similarity(backend=None, wait=False):
+    """Get the shared model, built on first use and kept up to date.
+
+    Only the first call builds the model on the caller's thread. After
+    that, a write to a source collection starts one background refresh and
+    the current model is returned right away; wait=True refreshes first.
+    """
+    global _refresh_thread
+    backend = backend or get_backend()
+    if _model is None or wait:
+        return _refresh(backend)
+
+    if any(backend.version(c) != _versions.get(c) for c in SOURCES):
+        with _refresh_lock:
+            if _refresh_thread is None or not _refresh_thread.is_alive():
+                _refresh_thread = threading.Thread(target=_refresh_quietly, args=(backend,), daemon=True)
+                _refresh_thread.start()
+    return _model
+
+def record_purchase(user, items):
+    """Add a purchase to the shared model right away, without waiting for a refresh"""
+    if _model is not None:
+        for name in items:
+            _model.add(user, name)
@@ -0,0 +1,286 @@
+import time
+from datetime import datetime
+import numpy as np
+from data.locations import find_coordinates
+from utils.bitmap import BitmapIndex
+
+# Days since harvest for a listing to count as a fresh harvest
+FRESH_HARVEST_DAYS = 7
+
+# Mean Earth radius used for distances
+EARTH_RADIUS_KM = 6371.0
+
+# Sort orders as (column, descending) pairs; the product id always breaks ties.
+# 'distance' is computed per query from filters['origin'] by order_by_distance.
+SORT_COLUMNS = {
+    None: [],
+    'rating': [('rating', True)],
+    'price_asc': [('price', False)],
+    'price_desc': [('price', True)],
+    'distance': [],
+}
+
+def haversine_km(lat, lon, lats, lons):
+    """Get great-circle distances in km from one point to arrays of points"""
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _timestamp(value):
+    """Get POSIX seconds from an ISO date string, or NaN when missing or invalid"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return np.nan
+
+class CatalogColumns:
+    """Columnar copy of a product list for vectorized filtering and sorting.
+
+    Every field the marketplace filters or sorts on is held as a NumPy array
+    aligned with positions in the product list, so a query is a handful of
+    boolean masks and one lexsort instead of a Python loop. Products
+    appended to the list are picked up by extend().
+
+    Category, location, organic and available are also kept as packed
+    bitmaps (utils.bitmap), so those filters combine as bitwise AND/OR.
+
+    Two secondary indexes are built lazily and rebuilt after extend():
+    harvest and expiry timestamps in sorted order, so freshness windows are
+    binary searches, and products grouped by distinct seller location, so
+    distance ordering sorts a few locations instead of every product.
+    """
+
+    def __init__(self, products, size=None):
+        self.products = products
+        self.size = 0
+        self.category_codes = {}
+        self.location_codes = {}
+        self.location_lat = np.empty(0, np.float64)
+        self.location_lon = np.empty(0, np.float64)
+        self._indexes = {}
+        self.bitmaps = BitmapIndex(['category', 'location', 'organic', 'available'])
+        self.id = np.empty(0, np.int64)
+        self.price = np.empty(0, np.float64)
+        self.rating = np.empty(0, np.float64)
+        self.category = np.empty(0, np.int32)
+        self.organic = np.empty(0, bool)
+        self.available = np.empty(0, bool)
+        self.harvested = np.empty(0, np.float64)
+        self.expires = np.empty(0, np.float64)
+        self.location = np.empty(0, np.int32)
+        self.extend(size)
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, size=None):
+        """Add columns for products appended to the list since the last call, up to size products"""
+        new = self.products[self.size:size]
+        if not new:
+            return
+        count = len(new)
+
+        codes = self.category_codes
+        locations = self.location_codes
+        columns = {
+            'id': np.fromiter((p.get('id') or 0 for p in new), np.int64, count),
+            'price': np.fromiter((p.get('price') or 0 for p in new), np.float64, count),
+            'rating': np.fromiter((p.get('rating') or 0 for p in new), np.float64, count),
+            'category': np.fromiter((codes.setdefault(p.get('category'), len(codes)) for p in new), np.int32, count),
+            'organic': np.fromiter((bool(p.get('organic', False)) for p in new), bool, count),
+            'available': np.fromiter((bool(p.get('available', True)) for p in new), bool, count),
+            'harvested': np.fromiter((_timestamp(p.get('harvest_date')) for p in new), np.float64, count),
+            'expires': np.fromiter((_timestamp(p.get('expiry_date')) for p in new), np.float64, count),
+            'location': np.fromiter((locations.setdefault(p.get('location'), len(locations)) for p in new), np.int32, count),
+        }
+        for name, column in columns.items():
+            setattr(self, name, np.concatenate([getattr(self, name), column]))
+        self.size += count
+        self.bitmaps.extend({field: columns[field] for field in self.bitmaps.fields})
+
+        # Coordinates of newly seen seller locations; unknown ones stay NaN
+        names = list(locations)[len(self.location_lat):]
+        points = [find_coordinates(name) or (np.nan, np.nan) for name in names]
+        self.location_lat = np.concatenate([self.location_lat, [lat for lat, lon in points]])
+        self.location_lon = np.concatenate([self.location_lon, [lon for lat, lon in points]])
+        self._indexes = {}
+
+    def _sorted_index(self, name):
+        """Get (positions, values) of a timestamp column in ascending order, missing values dropped"""
+        index = self._indexes.get(name)
+        if index is None:
+            column = getattr(self, name)
+            positions = np.argsort(column, kind='stable')
+            positions = positions[:np.count_nonzero(~np.isnan(column))]
+            index = self._indexes[name] = (positions, column[positions])
+        return index
+
+    def _location_groups(self):
+        """Get product positions grouped by location code, each group in id order"""
+        groups = self._indexes.get('location')
+        if groups is None:
+            order = np.lexsort((self.id, self.location))
+            bounds = np.searchsorted(self.location[order], np.arange(len(self.location_codes) + 1))
+            groups = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.location_codes))]
+            self._indexes['location'] = groups
+        return groups
+
+    def fresh_positions(self, now=None):
+        """Get positions of products harvested in the last FRESH_HARVEST_DAYS and not yet expired.
+
+        Walks whichever sorted range (recent harvests or unexpired listings)
+        is smaller and checks the other condition on just those products.
+        """
+        now = time.time() if now is None else now
+        harvest_positions, harvest_values = self._sorted_index('harvested')
+        recent = harvest_positions[np.searchsorted(harvest_values, now - FRESH_HARVEST_DAYS * 86400):]
+
+        expiry_positions, expiry_values = self._sorted_index('expires')
+        expired = expiry_positions[:np.searchsorted(expiry_values, now)]
+
+        # Listings without an expiry date never expire
+        if len(recent) <= self.size - len(expired):
+            return recent[~(self.expires[recent] < now)]
+        unexpired = np.ones(self.size, bool)
+        unexpired[expired] = False
+        positions = np.flatnonzero(unexpired)
+        return positions[self.harvested[positions] >= now - FRESH_HARVEST_DAYS * 86400]
+
+    def filter_bits(self, filters, exclude=()):
+        """Get the bitmap of products matching the category, location, organic and available filters.
+
+        filters['location'] may be one location or a list of them (any
+        matches). Filters named in exclude are ignored. Returns None when
+        no bitmap filter applies.
+        """
+        bits = None
+
+        category = filters.get('category') if 'category' not in exclude else None
+        if category and category != "All":
+            code = self.category_codes.get(category)
+            bits = self.bitmaps.get('category', code) if code is not None else self.bitmaps.empty()
+
+        location = filters.get('location') if 'location' not in exclude else None
+        if location:
+            names = [location] if isinstance(location, str) else location
+            codes = [self.location_codes[name] for name in names if name in self.location_codes]
+            location_bits = self.bitmaps.any_of('location', codes)
+            bits = location_bits if bits is None else bits & location_bits
+
+        for flag in ('organic', 'available'):
+            if filters.get(flag) and flag not in exclude:
+                flag_bits = self.bitmaps.get(flag, True)
+                bits = flag_bits if bits is None else bits & flag_bits
+
+        return bits
+
+    def mask(self, filters, now=None, exclude=()):
+        """Get a boolean array of the products matching every filter but search.
+
+        Supports category, location, organic, available, min_price,
+        max_price and fresh. Filters named in exclude are ignored.
+        """
+        bits = self.filter_bits(filters, exclude)
+        mask = self.bitmaps.to_mask(bits) if bits is not None else np.ones(self.size, bool)
+
+        if filters.get('min_price') is not None:
+            mask &= self.price >= filters['min_price']
+
+        if filters.get('max_price') is not None:
+            mask &= self.price <= filters['max_price']
+
+        if filters.get('fresh'):
+            fresh = np.zeros(self.size, bool)
+            fresh[self.fresh_positions(now)] = True
+            mask &= fresh
+
+        return mask
+
+    def facets(self, mask, filters):
+        """Count products per category, location and organic flag.
+
+        mask should leave out the category and organic filters: each facet
+        is counted with every filter except its own, so its counts show what
+        picking another value would return. Locations are counted under all
+        filters. Counts are popcounts over the packed bitmaps.
+        """
+        bitmaps = self.bitmaps
+        base = bitmaps.from_mask(mask)
+        category_bits = self.filter_bits({'category': filters.get('category')})
+        organic_bits = self.filter_bits({'organic': filters.get('organic')})
+
+        category_scope = base if organic_bits is None else base & organic_bits
+        location_scope = category_scope if category_bits is None else category_scope & category_bits
+        in_category = base if category_bits is None else base & category_bits
+
+        def counts(field, codes, scope):
+            found = {}
+            for name, code in codes.items():
+                count = bitmaps.count(bitmaps.get(field, code) & scope) if name is not None else 0
+                if count:
+                    found[name] = count
+            return found
+
+        organic = bitmaps.count(in_category & bitmaps.get('organic', True))
+        return {
+            'category': counts('category', self.category_codes, category_scope),
+            'location': counts('location', self.location_codes, location_scope),
+            'organic': {True: organic, False: bitmaps.count(in_category) - organic}
+        }
+
+    def sort_keys(self, sort, scores=None):
+        """Get the key columns of a sort order, most significant first.
+
+        scores (one per product) orders by relevance, highest first.
+        """
+        if scores is not None:
+            keys = [-scores]
+        else:
+            keys = [-getattr(self, name) if descending else getattr(self, name)
+                    for name, descending in SORT_COLUMNS[sort]]
+        return keys + [self.id]
+
+    def select(self, mask, sort=None, scores=None):
+        """Get (positions, keys) of the masked products, unordered, with their sort key columns"""
+        positions = np.flatnonzero(mask)
+        return positions, [column[positions] for column in self.sort_keys(sort, scores)]
+
+    def order_by_distance(self, mask, origin):
+        """Get (positions, keys) of the masked products, nearest to origin (lat, lon) first.
+
+        Distances are computed once per distinct seller location; products
+        at unknown locations come last.
+        """
+        distances = haversine_km(origin[0], origin[1], self.location_lat, self.location_lon)
+        distances = np.where(np.isnan(distances), np.inf, distances)
+
+        positions = []
+        keys = []
+        groups = self._location_groups()
+        codes = np.argsort(distances, kind='stable')
+        # Locations at the same distance (e.g. several names for one city) share a run
+        ordered = distances[codes]
+        runs = np.split(codes, np.flatnonzero(ordered[1:] != ordered[:-1]) + 1) if len(codes) else []
+        for run in runs:
+            group = np.concatenate([groups[code] for code in run])
+            if len(run) > 1:
+                group = group[np.argsort(self.id[group], kind='stable')]
+            group = group[mask[group]]
+            if len(group):
+                positions.append(group)
+                keys.append(np.full(len(group), distances[run[0]]))
+
+        if not positions:
+            empty = np.empty(0, np.int64)
+            return empty, [np.empty(0), empty]
+        positions = np.concatenate(positions)
+        return positions, [np.concatenate(keys), self.id[positions]]
+
+def keyset_after(keys, last_key):
+    """Get a boolean array of the rows of key columns that sort strictly after last_key"""
+    before = np.zeros(len(keys[0]), bool)
+    equal = np.ones(len(keys[0]), bool)
+    for column, value in zip(keys, last_key):
+        before |= equal & (column < value)
+        equal &= column == value
+    return ~(before | equal)
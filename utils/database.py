@@ -1,38 +1,118 @@
-import json
-import os
 from datetime import datetime, timedelta
+import os
 import random
+import threading
+from utils.bulk_io import parse_bool
+from utils.cache import LRUCache, result_cache
+from utils.storage import COLLECTIONS, RecordIndex, get_backend
+
+# Process-wide cache of indexed collections shared by every Streamlit session.
+# Entries are keyed by the collection's storage version, so a write from another
+# process (new file mtime) makes the next read miss; writes made here update the
+# cached index in place. Collections larger than CACHE_MAX_RECORDS are never
+# held in memory and fall back to the storage backend's own lookups; the
+# version they were found too large at is remembered so they are not re-read.
+CACHE_MAX_RECORDS = int(os.getenv("SAMA_CACHE_MAX_RECORDS", "200000"))
+CACHED_COLLECTIONS = ['products', 'messages', 'transactions', 'recommendations']
+_collection_caches = {collection: LRUCache(maxsize=1) for collection in CACHED_COLLECTIONS}
+_oversized = {}
+_load_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+def load_indexed(collection, backend=None):
+    """Load a collection with its per-user indexes through the process-wide cache.
+
+    Returns None when the collection is too large to cache.
+    """
+    backend = backend or get_backend()
+    cache = _collection_caches[collection]
+    key = (backend.name, backend.version(collection))
+    if _oversized.get(collection) == key:
+        return None
+
+    index = cache.get(key)
+    if index is None:
+        # Only one session parses the file when many miss at once
+        with _load_lock:
+            index = cache.peek(key)
+            if index is None:
+                records = backend.load_all(collection)
+                if len(records) > CACHE_MAX_RECORDS:
+                    _oversized[collection] = key
+                    return None
+                index = RecordIndex(records, COLLECTIONS[collection])
+                cache.set(key, index)
+    return index
+
+def load_catalog(backend=None):
+    """Load the product catalog through the process-wide cache"""
+    backend = backend or get_backend()
+    index = load_indexed('products', backend)
+    return index.records if index is not None else backend.load_all('products')
+
+def find_records(collection, fields, value, backend=None):
+    """Get records where any of the fields equals value, using the cached index"""
+    backend = backend or get_backend()
+    index = load_indexed(collection, backend)
+    if index is None:
+        return backend.find(collection, fields, value)
+    return index.find(fields, value)
+
+def insert_record(collection, record):
+    """Insert a record and keep the cached index of its collection current"""
+    return insert_records(collection, [record])[0]
+
+def insert_records(collection, records):
+    """Insert records in one write and keep the cached index of their collection current"""
+    backend = get_backend()
+    cache = _collection_caches[collection]
+
+    with _write_lock:
+        previous_key = (backend.name, backend.version(collection))
+        saved, seen = backend.insert_many(collection, records, with_version=True)
+
+        index = cache.peek(previous_key)
+        if index is not None and (backend.name, seen) == previous_key:
+            for record in saved:
+                index.add(record)
+            cache.set((backend.name, backend.version(collection)), index)
+        elif index is not None:
+            # Another writer got in before our lock; the index misses its records
+            cache.clear()
+    return saved
+
+def get_cache_stats():
+    """Get hit/miss counters of the collection caches and the shared result cache"""
+    stats = {collection: cache.stats() for collection, cache in _collection_caches.items()}
+    stats['results'] = result_cache.stats()
+    return stats
 
 def get_user_products(user_email):
     """Get products belonging to a specific user"""
-    products_file = "data/products.json"
+    backend = get_backend()
     
-    if not os.path.exists(products_file):
+    if not backend.exists('products'):
         return []
     
     try:
-        with open(products_file, 'r') as f:
-            products = json.load(f)
+        return find_records('products', ['seller_email'], user_email, backend)
     except:
         return []
-    
-    user_products = [p for p in products if p.get('seller_email') == user_email]
-    return user_products
 
 def get_all_products():
     """Get all available products"""
-    products_file = "data/products.json"
+    backend = get_backend()
     
-    if not os.path.exists(products_file):
-        # Create sample products if file doesn't exist
+    if not backend.exists('products'):
+        # Create sample products if the store is empty
         return create_sample_products()
     
+    # A store that exists but cannot be read (e.g. a lock timeout) must not
+    # be replaced by sample data
     try:
-        with open(products_file, 'r') as f:
-            products = json.load(f)
-        return products
+        return list(load_catalog(backend))
     except:
-        return create_sample_products()
+        return []
 
 def create_sample_products():
     """Create sample products for demonstration"""
@@ -61,11 +141,9 @@ def create_sample_products():
         }
         products.append(product)
     
-    # Save to file
-    os.makedirs("data", exist_ok=True)
+    # Save to storage
     try:
-        with open("data/products.json", 'w') as f:
-            json.dump(products, f, indent=2)
+        get_backend().replace_all('products', products)
     except:
         pass
     
@@ -73,23 +151,9 @@ def create_sample_products():
 
 def add_product(product_data):
     """Add a new product to the database"""
-    products_file = "data/products.json"
-    
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
     
-    # Load existing products or create empty list
-    products = []
-    if os.path.exists(products_file):
-        try:
-            with open(products_file, 'r') as f:
-                products = json.load(f)
-        except:
-            products = []
-    
-    # Add new product
+    # Add new product (the storage backend assigns the id)
     new_product = {
-        'id': len(products) + 1,
         'created_at': datetime.now().isoformat(),
         'available': True,
         'rating': 0,
@@ -97,31 +161,104 @@ def add_product(product_data):
         **product_data
     }
     
-    products.append(new_product)
-    
-    # Save to file
+    # Save to storage
     try:
-        with open(products_file, 'w') as f:
-            json.dump(products, f, indent=2)
-        return new_product
+        return insert_record('products', new_product)
     except:
         return None
 
+def validate_product(product_data):
+    """Validate and normalize one product row (e.g. read from CSV).
+
+    Rows from an export round-trip: their id is dropped (the store assigns
+    a new one) and typed fields read back from CSV text are converted.
+    Returns (product, None) on success or (None, error message).
+    """
+    product = {k: v for k, v in product_data.items() if v is not None and v != '' and k != 'id'}
+
+    for field in ['name', 'category', 'price', 'quantity', 'seller_email']:
+        if field not in product:
+            return None, f"Missing {field}"
+
+    try:
+        product['price'] = float(product['price'])
+        product['quantity'] = int(float(product['quantity']))
+    except (TypeError, ValueError):
+        return None, "Price and quantity must be numbers"
+
+    if product['price'] <= 0 or product['quantity'] <= 0:
+        return None, "Price and quantity must be positive"
+
+    try:
+        if 'rating' in product:
+            product['rating'] = float(product['rating'])
+        if 'reviews_count' in product:
+            product['reviews_count'] = int(float(product['reviews_count']))
+    except (TypeError, ValueError):
+        return None, "Rating and reviews_count must be numbers"
+
+    for flag in ('organic', 'available'):
+        if flag in product:
+            product[flag] = parse_bool(product[flag])
+
+    return {
+        'created_at': datetime.now().isoformat(),
+        'available': True,
+        'rating': 0,
+        'reviews_count': 0,
+        **product
+    }, None
+
+def bulk_add_products(products):
+    """Validate and add many products in a single write.
+
+    Nothing is saved if any row is invalid, so an import can be fixed and rerun.
+    """
+    new_products = []
+    errors = []
+    for row_number, product_data in enumerate(products, start=1):
+        product, error = validate_product(product_data)
+        if error:
+            errors.append({'row': row_number, 'error': error})
+        else:
+            new_products.append(product)
+
+    if errors:
+        return {
+            'success': False,
+            'message': f'{len(errors)} invalid rows, no products were imported',
+            'inserted': 0,
+            'errors': errors
+        }
+
+    try:
+        inserted = insert_records('products', new_products)
+    except:
+        return {
+            'success': False,
+            'message': 'Products could not be saved',
+            'inserted': 0,
+            'errors': []
+        }
+
+    return {
+        'success': True,
+        'message': f'{len(inserted)} products imported',
+        'inserted': len(inserted),
+        'errors': []
+    }
+
 def get_user_messages(user_email):
     """Get messages for a specific user"""
-    messages_file = "data/messages.json"
+    backend = get_backend()
     
-    if not os.path.exists(messages_file):
+    if not backend.exists('messages'):
         return create_sample_messages(user_email)
     
     try:
-        with open(messages_file, 'r') as f:
-            messages = json.load(f)
+        return find_records('messages', ['to', 'from'], user_email, backend)
     except:
-        return create_sample_messages(user_email)
-    
-    user_messages = [m for m in messages if m.get('to') == user_email or m.get('from') == user_email]
-    return user_messages
+        return []
 
 def create_sample_messages(user_email):
     """Create sample messages for demonstration"""
@@ -155,11 +292,9 @@ def create_sample_messages(user_email):
         }
     ]
     
-    # Save to file
-    os.makedirs("data", exist_ok=True)
+    # Save to storage
     try:
-        with open("data/messages.json", 'w') as f:
-            json.dump(messages, f, indent=2)
+        get_backend().replace_all('messages', messages)
     except:
         pass
     
@@ -167,23 +302,9 @@ def create_sample_messages(user_email):
 
 def add_message(from_email, to_email, subject, content):
     """Add a new message to the database"""
-    messages_file = "data/messages.json"
-    
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
     
-    # Load existing messages or create empty list
-    messages = []
-    if os.path.exists(messages_file):
-        try:
-            with open(messages_file, 'r') as f:
-                messages = json.load(f)
-        except:
-            messages = []
-    
-    # Add new message
+    # Add new message (the storage backend assigns the id)
     new_message = {
-        'id': len(messages) + 1,
         'from': from_email,
         'to': to_email,
         'subject': subject,
@@ -192,34 +313,26 @@ def add_message(from_email, to_email, subject, content):
         'read': False
     }
     
-    messages.append(new_message)
-    
-    # Save to file
+    # Save to storage
     try:
-        with open(messages_file, 'w') as f:
-            json.dump(messages, f, indent=2)
-        return new_message
+        return insert_record('messages', new_message)
     except:
         return None
 
 def get_transactions(user_email=None):
     """Get transaction history"""
-    transactions_file = "data/transactions.json"
+    backend = get_backend()
     
-    if not os.path.exists(transactions_file):
+    if not backend.exists('transactions'):
         return create_sample_transactions(user_email)
     
     try:
-        with open(transactions_file, 'r') as f:
-            transactions = json.load(f)
+        if user_email:
+            return find_records('transactions', ['buyer_email', 'seller_email'], user_email, backend)
+        index = load_indexed('transactions', backend)
+        return list(index.records) if index is not None else backend.load_all('transactions')
     except:
-        return create_sample_transactions(user_email)
-    
-    if user_email:
-        user_transactions = [t for t in transactions if t.get('buyer_email') == user_email or t.get('seller_email') == user_email]
-        return user_transactions
-    
-    return transactions
+        return []
 
 def create_sample_transactions(user_email):
     """Create sample transactions for demonstration"""
@@ -252,11 +365,9 @@ def create_sample_transactions(user_email):
         }
     ]
     
-    # Save to file
-    os.makedirs("data", exist_ok=True)
+    # Save to storage
     try:
-        with open("data/transactions.json", 'w') as f:
-            json.dump(transactions, f, indent=2)
+        get_backend().replace_all('transactions', transactions)
     except:
         pass
     
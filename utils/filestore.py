@@ -0,0 +1,91 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from utils import serializers
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; locking becomes a no-op there
+    fcntl = None
+
+LOCK_TIMEOUT = 30.0
+
+# Locks held by the current thread, so nested file_lock calls re-enter
+_held_locks = threading.local()
+
+class LockTimeout(OSError):
+    """Raised when a store's file lock cannot be acquired in time"""
+
+def retry(operation, attempts=5, base_delay=0.01, exceptions=(OSError,)):
+    """Run operation, retrying transient failures with exponential backoff and jitter"""
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except exceptions:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Hold an exclusive advisory lock on <path>.lock for the duration of the block.
+
+    Waits with exponential backoff instead of blocking so a stuck writer
+    surfaces as LockTimeout rather than a hung Streamlit session.
+    """
+    held = _held_locks.__dict__.setdefault('paths', {})
+    if path in held:
+        held[path] += 1
+        try:
+            yield
+        finally:
+            held[path] -= 1
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            deadline = time.monotonic() + timeout
+            delay = 0.001
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise LockTimeout(f"Timed out waiting for lock on {path}")
+                    time.sleep(delay * (0.5 + random.random()))
+                    delay = min(delay * 2, 0.1)
+        held[path] = 1
+        yield
+    finally:
+        held.pop(path, None)
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+def read_data(path, default=None):
+    """Read a JSON or MessagePack file, returning default if it does not exist"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'rb') as f:
+        return serializers.loads(f.read())
+
+def write_data_atomic(path, data, fmt=None):
+    """Write data in the selected serializer format through a temp file and os.replace.
+
+    Readers see either the old or the new file, never a truncated one.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(serializers.dumps(data, fmt))
+            f.flush()
+            os.fsync(f.fileno())
+        retry(lambda: os.replace(tmp_path, path))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,58 @@
+import os
+import threading
+from utils.filestore import file_lock, retry
+
+class IdAllocator:
+    """Monotonic id sequence persisted in a small file.
+
+    Each process reserves a block of ids under the file lock and then hands
+    them out from memory, so most new records get an id without any file I/O
+    and never by loading the collection. Ids are unique across processes and
+    increasing within a process; unused ids of a block are skipped when the
+    process exits.
+    """
+
+    def __init__(self, seq_path, block_size=32, seed=None):
+        self.seq_path = seq_path
+        self.block_size = block_size
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def next_id(self):
+        """Get the next unused id"""
+        with self._lock:
+            if self._next >= self._limit:
+                self._reserve(self.block_size)
+            new_id = self._next
+            self._next += 1
+            return new_id
+
+    def reserve(self, count):
+        """Get a contiguous range of count fresh ids, e.g. for a bulk insert"""
+        with self._lock:
+            start = self._advance(count)
+            return range(start, start + count)
+
+    def _reserve(self, count):
+        """Take a new block of count ids for next_id"""
+        self._next = self._advance(count)
+        self._limit = self._next + count
+
+    def _advance(self, count):
+        """Advance the persisted sequence by count and return the first reserved id"""
+        with file_lock(self.seq_path):
+            last = self._read_last()
+            with open(f"{self.seq_path}.tmp", 'w') as f:
+                f.write(str(last + count))
+            retry(lambda: os.replace(f"{self.seq_path}.tmp", self.seq_path))
+        return last + 1
+
+    def _read_last(self):
+        """Get the highest id handed out so far, seeding a new sequence from existing data"""
+        try:
+            with open(self.seq_path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return self.seed() if self.seed else 0
@@ -0,0 +1,241 @@
+import atexit
+import os
+import threading
+import time
+from utils.filestore import file_lock, read_data, write_data_atomic
+from utils.serializers import dumps_compact, loads_json
+
+class AppendLog:
+    """Append-only JSON-Lines log in front of a JSON array snapshot.
+
+    New records are appended to <name>.log.jsonl in O(1) and fsync'd in
+    batches (group commit). Once the log grows past compact_every entries it
+    is folded into the <name>.json snapshot, written in the configured
+    serializer format (see utils/serializers.py). Appends, reads and
+    compaction take the store's file lock, so several processes can share one
+    log safely.
+
+    Lock order is always the store's file lock first, then the in-process
+    lock, the same order as JsonBackend's writes, which hold the file lock
+    when they call in here.
+    """
+
+    def __init__(self, snapshot_path, sync_every=32, sync_interval=0.05, compact_every=1000):
+        self.snapshot_path = snapshot_path
+        self.log_path = os.path.splitext(snapshot_path)[0] + ".log.jsonl"
+        self.compacting_path = self.log_path + ".compacting"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._fd = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+        self._log_entries = 0
+        atexit.register(self.close)
+
+    def exists(self):
+        """Check whether the snapshot or any log file is present"""
+        return any(os.path.exists(p) for p in (self.snapshot_path, self.log_path, self.compacting_path))
+
+    def read_all(self):
+        """Read the snapshot followed by every logged record"""
+        with file_lock(self.snapshot_path), self._lock:
+            self._recover()
+            records = self._read_snapshot()
+            records.extend(_read_lines(self.log_path))
+            return records
+
+    def read_after(self, cursor=None):
+        """Get (records, cursor, reset) for the records added since cursor.
+
+        The cursor pairs the snapshot's file signature with a byte offset
+        into the log, so while the snapshot is unchanged only the new log
+        lines are read. After a compaction or rewrite (or with no cursor)
+        every record is returned and reset is True.
+        """
+        with file_lock(self.snapshot_path), self._lock:
+            self._recover()
+            snapshot = _signature(self.snapshot_path)
+            if cursor is not None and cursor[0] == snapshot:
+                records, offset = _read_lines_from(self.log_path, cursor[1])
+                return records, (snapshot, offset), False
+            records = self._read_snapshot()
+            entries, offset = _read_lines_from(self.log_path, 0)
+            return records + entries, (snapshot, offset), True
+
+    def append(self, record):
+        """Append one record; durable on disk after the next group commit"""
+        return self.extend([record])[0]
+
+    def extend(self, records):
+        """Append several records with a single write"""
+        data = b"".join(dumps_compact(record) + b"\n" for record in records)
+        if not data:
+            return records
+
+        with file_lock(self.snapshot_path), self._lock:
+            fd = self._open()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            self._pending += len(records)
+            self._log_entries += len(records)
+
+            if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+            elif self._timer is None:
+                # Make sure a lone append still reaches the disk shortly
+                self._timer = threading.Timer(self.sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+            if self._log_entries >= self.compact_every:
+                self._compact()
+
+        return records
+
+    def sync(self):
+        """Flush pending appends to disk"""
+        with self._lock:
+            self._sync()
+
+    def compact(self):
+        """Fold the log into the snapshot and start a fresh log"""
+        with file_lock(self.snapshot_path), self._lock:
+            self._compact()
+
+    def rewrite(self, records):
+        """Replace all records with a new snapshot and an empty log"""
+        with file_lock(self.snapshot_path), self._lock:
+            self._close_log()
+            write_data_atomic(self.snapshot_path, records)
+            for path in (self.log_path, self.compacting_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def close(self):
+        """Sync and close the log file"""
+        with self._lock:
+            self._close_log()
+
+    def _compact(self):
+        self._close_log()
+        self._recover()
+        if not os.path.exists(self.log_path):
+            return
+
+        os.replace(self.log_path, self.compacting_path)
+        self._finish_compaction()
+
+    def _open(self):
+        """Open the log for appending, repairing a torn last line first"""
+        if self._fd is not None and not _is_open_file(self._fd, self.log_path):
+            # Another process compacted the log since we opened it
+            self._close_log()
+
+        if self._fd is None:
+            self._recover()
+            _truncate_torn_tail(self.log_path)
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._log_entries = len(_read_lines(self.log_path))
+        return self._fd
+
+    def _sync(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._fd is not None and self._pending:
+            os.fsync(self._fd)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _close_log(self):
+        if self._fd is not None:
+            self._sync()
+            os.close(self._fd)
+            self._fd = None
+        self._log_entries = 0
+
+    def _recover(self):
+        """Finish a compaction that was interrupted by a crash"""
+        if os.path.exists(self.compacting_path):
+            self._finish_compaction()
+
+    def _finish_compaction(self):
+        entries = _read_lines(self.compacting_path)
+        records = self._read_snapshot()
+
+        # The snapshot may already hold these entries if we crashed after writing it
+        if entries and records[-len(entries):] != entries:
+            records.extend(entries)
+            write_data_atomic(self.snapshot_path, records)
+
+        os.remove(self.compacting_path)
+
+    def _read_snapshot(self):
+        return read_data(self.snapshot_path, [])
+
+def _read_lines(path):
+    """Read JSON-Lines records, skipping a torn or corrupt line"""
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                records.append(loads_json(line))
+            except ValueError:
+                continue
+    return records
+
+def _read_lines_from(path, offset):
+    """Read the complete JSON-Lines records from a byte offset; get (records, offset after them)"""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    # A partial last line is left for the next read
+    data = data[:data.rfind(b"\n") + 1]
+    records = []
+    for line in data.splitlines():
+        try:
+            records.append(loads_json(line))
+        except ValueError:
+            continue
+    return records, offset + len(data)
+
+def _signature(path):
+    """Get (mtime_ns, size) of a file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _is_open_file(fd, path):
+    """Check whether fd still refers to the file currently at path"""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(fd)
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+def _truncate_torn_tail(path):
+    """Cut off a partial last line left by a crash mid-append"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        data = f.read()
+        f.truncate(data.rfind(b"\n") + 1)
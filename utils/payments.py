@@ -1,12 +1,13 @@
 import random
 import json
-import os
 from datetime import datetime
 import hashlib
 import uuid
+from utils.storage import get_backend
+from utils.collaborative import record_purchase
 
-def process_mobile_payment(payment_method, phone_number, amount):
-    """Process mobile money payment"""
+def process_mobile_payment(payment_method, phone_number, amount, buyer_email=None, items=None):
+    """Process mobile money payment; buyer_email and items (product names) are logged for recommendations"""
     
     # Validate inputs
     if not phone_number or not amount or amount <= 0:
@@ -30,10 +31,13 @@ def process_mobile_payment(payment_method, phone_number, amount):
             'phone_number': phone_number,
             'amount': amount,
             'status': 'completed',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'buyer_email': buyer_email,
+            'items': list(items or [])
         }
         
         log_transaction(transaction_data)
+        record_purchase(buyer_email, transaction_data['items'])
         
         return {
             'success': True,
@@ -63,27 +67,9 @@ def generate_transaction_id():
     return f"SAL{timestamp[-6:]}{random_part}"
 
 def log_transaction(transaction_data):
-    """Log transaction to file"""
-    transactions_file = "data/payment_logs.json"
-    
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
-    
-    # Load existing transactions or create empty list
-    transactions = []
-    if os.path.exists(transactions_file):
-        try:
-            with open(transactions_file, 'r') as f:
-                transactions = json.load(f)
-        except:
-            transactions = []
-    
-    transactions.append(transaction_data)
-    
-    # Save to file
+    """Log transaction to the append-only payment log"""
     try:
-        with open(transactions_file, 'w') as f:
-            json.dump(transactions, f, indent=2)
+        get_backend().insert('payment_logs', transaction_data)
     except:
         pass
 
@@ -236,22 +222,17 @@ def calculate_transaction_fee(amount, payment_method):
 
 def get_transaction_status(transaction_id):
     """Get the status of a transaction"""
-    transactions_file = "data/payment_logs.json"
+    backend = get_backend()
     
-    if not os.path.exists(transactions_file):
+    if not backend.exists('payment_logs'):
         return None
     
     try:
-        with open(transactions_file, 'r') as f:
-            transactions = json.load(f)
+        transactions = backend.find('payment_logs', ['transaction_id'], transaction_id)
     except:
         return None
     
-    for transaction in transactions:
-        if transaction.get('transaction_id') == transaction_id:
-            return transaction
-    
-    return None
+    return transactions[0] if transactions else None
 
 def refund_transaction(transaction_id, reason=""):
     """Process a refund for a transaction"""
@@ -297,27 +278,9 @@ def refund_transaction(transaction_id, reason=""):
         }
 
 def log_refund(refund_data):
-    """Log refund to file"""
-    refunds_file = "data/refund_logs.json"
-    
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
-    
-    # Load existing refunds or create empty list
-    refunds = []
-    if os.path.exists(refunds_file):
-        try:
-            with open(refunds_file, 'r') as f:
-                refunds = json.load(f)
-        except:
-            refunds = []
-    
-    refunds.append(refund_data)
-    
-    # Save to file
+    """Log refund to the append-only refund log"""
     try:
-        with open(refunds_file, 'w') as f:
-            json.dump(refunds, f, indent=2)
+        get_backend().insert('refund_logs', refund_data)
     except:
         pass
 
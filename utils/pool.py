@@ -0,0 +1,115 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up in time"""
+
+class ConnectionPool:
+    """Bounded pool of reusable connections shared by Streamlit script threads.
+
+    Connections are created lazily up to max_size and handed back after each
+    use instead of being closed. A thread that already holds a connection
+    gets the same one back on nested checkouts, so a session() block can run
+    several storage calls on one connection.
+    """
+
+    def __init__(self, factory, max_size=8, timeout=30.0):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.held = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.held = None
+            if getattr(conn, 'in_transaction', False):
+                conn.rollback()
+            self._release(conn)
+
+    def _acquire(self):
+        start = time.perf_counter()
+        waited = False
+        with self._condition:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    conn = None
+                    break
+
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise PoolTimeout(f"No connection available after {self.timeout}s")
+
+            self.checkouts += 1
+            if waited:
+                wait = time.perf_counter() - start
+                self.waits += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+        if conn is None:
+            try:
+                conn = self.factory()
+            except Exception:
+                with self._condition:
+                    self._created -= 1
+                    self._condition.notify()
+                raise
+        return conn
+
+    def _release(self, conn):
+        with self._condition:
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._condition:
+            for conn in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle = []
+
+    def stats(self):
+        """Get pool size and wait-time metrics"""
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'total_wait_ms': round(self.total_wait * 1000, 3),
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'avg_wait_ms': round(self.total_wait * 1000 / self.waits, 3) if self.waits else 0.0
+            }
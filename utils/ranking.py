@@ -0,0 +1,31 @@
+import heapq
+import numpy as np
+
+def top_k(items, k, key):
+    """Get the k items with the smallest key, in order.
+
+    Uses a bounded heap instead of sorting everything; items with equal keys
+    keep their original order, exactly like sorted(items, key=key)[:k].
+    """
+    return heapq.nsmallest(k, items, key=key)
+
+def top_k_rows(keys, k):
+    """Get indices of the k lexicographically smallest rows of key columns, in order.
+
+    keys are equal-length arrays, most significant first, and should end
+    with a unique column (such as the product id) so ties are stable.
+    Partitions on the first column and only sorts the rows that can make
+    the cut, instead of sorting every row.
+    """
+    count = len(keys[0])
+    if k <= 0 or count == 0:
+        return np.empty(0, np.int64)
+    if k < count:
+        primary = keys[0]
+        kth = np.partition(primary, k - 1)[k - 1]
+        candidates = np.flatnonzero(primary <= kth)
+    else:
+        candidates = np.arange(count)
+    # lexsort takes its most significant key last
+    order = np.lexsort([column[candidates] for column in keys[::-1]])
+    return candidates[order[:k]]
@@ -1,17 +1,121 @@
-import random
+import hashlib
+import json
+import os
+from datetime import date
+from utils.cache import LRUCache
+from utils.collaborative import get_item_similarity
+from utils.database import find_records
+from utils.rng import user_rng, daily_rng
+from utils.vectors import SimilarityIndex
 from data.crops import AFRICAN_CROPS
 
-def get_recommendations(user):
-    """Generate AI-powered recommendations for the user"""
+# Lookup tables over AFRICAN_CROPS, built once at import time
+CROPS_BY_REGION = {}
+CROPS_BY_CATEGORY = {}
+CROPS_BY_NAME = {}
+for _crop in AFRICAN_CROPS:
+    CROPS_BY_REGION.setdefault(_crop['region'], []).append(_crop)
+    CROPS_BY_CATEGORY.setdefault(_crop['category'], []).append(_crop)
+    CROPS_BY_NAME.setdefault(_crop['name'].lower(), _crop)
+del _crop
+
+# Recommendations per user, reused across reruns until the TTL runs out
+RECOMMENDATION_TTL = float(os.getenv("SAMA_RECOMMENDATION_TTL", "300"))
+_recommendation_cache = LRUCache(maxsize=4096, ttl=RECOMMENDATION_TTL)
+_location_cache = LRUCache(maxsize=1024)
+
+def get_crops_for_location(location):
+    """Get crops whose region and the location contain one another, in AFRICAN_CROPS order"""
+    if not location:
+        return []
+    crops = _location_cache.get(location)
+    if crops is None:
+        # Only the distinct regions are scanned, once per location
+        crops = [
+            crop
+            for region, region_crops in CROPS_BY_REGION.items()
+            if region in location or location in region
+            for crop in region_crops
+        ]
+        order = {id(crop): i for i, crop in enumerate(AFRICAN_CROPS)}
+        crops.sort(key=lambda crop: order[id(crop)])
+        _location_cache.set(location, crops)
+    return crops
+
+_crop_similarity = None
+
+def get_crop_similarity():
+    """Get the feature-vector similarity index over AFRICAN_CROPS, built on first use"""
+    global _crop_similarity
+    if _crop_similarity is None:
+        _crop_similarity = SimilarityIndex(AFRICAN_CROPS)
+    return _crop_similarity
+
+def _user_key(user):
+    """Get the parts of a user that recommendations depend on, with the day their generator is seeded by"""
+    return (user.get('email'), user.get('location', ''), user.get('type'), date.today().isoformat())
+
+def _item_similarity():
+    """Get the shared collaborative-filtering model, or None when storage is unavailable"""
+    try:
+        return get_item_similarity()
+    except:
+        return None
+
+def _crops_named(names):
+    """Get the crops for item keys, skipping products that are not known crops"""
+    return [CROPS_BY_NAME[name] for name in names if name in CROPS_BY_NAME]
+
+def recommendation_fingerprint(user, model=None):
+    """Get a hash of the inputs a user's recommendations are computed from"""
+    purchases = sorted(model.baskets.get(user.get('email')) or ()) if model else []
+    inputs = [user.get('email'), user.get('location', ''), user.get('type'), purchases, date.today().isoformat()]
+    return hashlib.sha1(json.dumps(inputs).encode()).hexdigest()
+
+def get_precomputed(user, model=None):
+    """Get the user's row written by utils.batch_recommendations, or None when missing or out of date"""
+    if not user.get('email'):
+        return None
+    try:
+        rows = find_records('recommendations', ['email'], user['email'])
+    except:
+        return None
+    if rows and rows[-1].get('fingerprint') == recommendation_fingerprint(user, model):
+        return rows[-1]
+    return None
+
+def get_recommendations(user, rng=None):
+    """Generate AI-powered recommendations for the user, cached per user for RECOMMENDATION_TTL seconds.
+
+    A current row precomputed by the batch job is used when there is one.
+    Passing rng bypasses both and draws from it instead.
+    """
+    if rng is not None:
+        return build_recommendations(user, rng)
+    key = ('tips',) + _user_key(user)
+    recommendations = _recommendation_cache.get(key)
+    if recommendations is None:
+        row = get_precomputed(user, _item_similarity())
+        recommendations = row['tips'] if row else build_recommendations(user)
+        _recommendation_cache.set(key, recommendations)
+    return list(recommendations)
+
+def build_recommendations(user, rng=None):
+    """Generate the user's selection of recommendations.
+
+    Draws come from rng, by default the user's generator for the day
+    (utils.rng), so the same user gets the same selection all day.
+    """
+    rng = rng or user_rng(user, 'tips')
     
     recommendations = []
     
     # Location-based recommendations
     user_location = user.get('location', '')
     if user_location:
-        location_crops = [crop for crop in AFRICAN_CROPS if crop['region'] in user_location or user_location in crop['region']]
+        location_crops = get_crops_for_location(user_location)
         if location_crops:
-            crop = random.choice(location_crops)
+            crop = rng.choice(location_crops)
             recommendations.append(f"Based on your location ({user_location}), {crop['name']} is in high demand with an average price of ${crop['price_per_kg']:.2f}/kg")
     
     # User type based recommendations
@@ -40,9 +144,9 @@ def get_recommendations(user):
         recommendations.append("Rainy season alert: Focus on quick-harvesting crops and ensure proper drainage")
     
     # Market trend recommendations
-    trending_crops = random.sample(AFRICAN_CROPS, 3)
+    trending_crops = rng.sample(AFRICAN_CROPS, 3)
     for crop in trending_crops:
-        recommendations.append(f"{crop['name']} shows strong market performance with {random.randint(5, 25)}% price increase this quarter")
+        recommendations.append(f"{crop['name']} shows strong market performance with {rng.randint(5, 25)}% price increase this quarter")
     
     # Quality and safety recommendations
     recommendations.extend([
@@ -52,30 +156,61 @@ def get_recommendations(user):
     ])
     
     # Return random selection of recommendations
-    return random.sample(recommendations, min(5, len(recommendations)))
+    return rng.sample(recommendations, min(5, len(recommendations)))
 
-def get_product_recommendations(user, current_product=None):
-    """Get product recommendations based on user behavior and preferences"""
+def get_product_recommendations(user, current_product=None, rng=None):
+    """Get product recommendations based on user behavior and preferences.
+
+    Cached per user and viewed product for RECOMMENDATION_TTL seconds; a
+    new purchase by the user starts a fresh entry. Without a viewed
+    product, a current row precomputed by the batch job is used when there
+    is one. Passing rng bypasses both and draws from it instead.
+    """
+    model = _item_similarity()
+    if rng is not None:
+        return build_product_recommendations(user, current_product, model, rng)
+    purchases = len(model.baskets.get(user.get('email')) or ()) if model else 0
+    key = ('products',) + _user_key(user) + (purchases,)
+    if current_product:
+        key += (current_product.get('category'), current_product.get('name'))
+    recommendations = _recommendation_cache.get(key)
+    if recommendations is None:
+        row = get_precomputed(user, model) if not current_product else None
+        if row:
+            recommendations = [CROPS_BY_NAME[name.lower()] for name in row['products'] if name.lower() in CROPS_BY_NAME]
+        else:
+            recommendations = build_product_recommendations(user, current_product, model)
+        _recommendation_cache.set(key, recommendations)
+    return list(recommendations)
+
+def build_product_recommendations(user, current_product=None, model=None, rng=None):
+    """Pick the user's recommended crops, drawing from rng (by default the user's generator for the day)"""
+    rng = rng or user_rng(user, 'products')
     
     recommendations = []
     
-    # If viewing a specific product, recommend similar ones
+    # If viewing a specific product, recommend what its buyers also bought,
+    # topped up with the crops nearest to it by features
     if current_product:
+        bought_with = _crops_named(model.similar(current_product.get('name'), 3)) if model else []
+        recommendations.extend(bought_with)
+        # Listings carry few crop fields, so describe them by their crop where known
+        crop = CROPS_BY_NAME.get((current_product.get('name') or '').lower())
         similar_products = [
-            crop for crop in AFRICAN_CROPS 
-            if crop['category'] == current_product.get('category') 
-            and crop['name'] != current_product.get('name')
+            similar for similar in get_crop_similarity().similar_to({**(crop or {}), **current_product}, 4 + len(bought_with))
+            if similar['name'] != current_product.get('name') and similar not in bought_with
         ]
-        recommendations.extend(random.sample(similar_products, min(3, len(similar_products))))
+        recommendations.extend(similar_products[:3 - len(bought_with)])
+    
+    # Crops bought by buyers with a similar purchase history
+    if model and user.get('email'):
+        recommendations.extend(_crops_named(model.recommend(user['email'], 3)))
     
     # Location-based product recommendations
     user_location = user.get('location', '')
     if user_location:
-        local_products = [
-            crop for crop in AFRICAN_CROPS 
-            if crop['region'] in user_location or user_location in crop['region']
-        ]
-        recommendations.extend(random.sample(local_products, min(2, len(local_products))))
+        local_products = get_crops_for_location(user_location)
+        recommendations.extend(rng.sample(local_products, min(2, len(local_products))))
     
     # Remove duplicates while preserving order
     seen = set()
@@ -87,29 +222,30 @@ def get_product_recommendations(user, current_product=None):
     
     return unique_recommendations[:5]
 
-def get_price_predictions(crop_name):
-    """Generate price prediction for a specific crop"""
+def get_price_predictions(crop_name, rng=None):
+    """Generate price prediction for a specific crop, the same all day unless another rng is given"""
     
     # Find the crop in our database
-    crop = next((c for c in AFRICAN_CROPS if c['name'].lower() == crop_name.lower()), None)
+    crop = CROPS_BY_NAME.get(crop_name.lower())
     
     if not crop:
         return None
     
+    rng = rng or daily_rng('price', crop['name'])
     current_price = crop['price_per_kg']
     
     # Generate realistic price fluctuations
     factors = {
-        'seasonal': random.uniform(-0.2, 0.3),  # Seasonal variation
-        'weather': random.uniform(-0.15, 0.25),  # Weather impact
-        'demand': random.uniform(-0.1, 0.2),     # Market demand
-        'supply': random.uniform(-0.2, 0.1)      # Supply chain factors
+        'seasonal': rng.uniform(-0.2, 0.3),  # Seasonal variation
+        'weather': rng.uniform(-0.15, 0.25),  # Weather impact
+        'demand': rng.uniform(-0.1, 0.2),     # Market demand
+        'supply': rng.uniform(-0.2, 0.1)      # Supply chain factors
     }
     
     predictions = []
     
     for week in range(1, 5):  # 4-week prediction
-        price_change = sum(factors.values()) * random.uniform(0.5, 1.5)
+        price_change = sum(factors.values()) * rng.uniform(0.5, 1.5)
         predicted_price = current_price * (1 + price_change)
         predicted_price = max(0.1, predicted_price)  # Ensure positive price
         
@@ -117,7 +253,7 @@ def get_price_predictions(crop_name):
             'week': week,
             'predicted_price': round(predicted_price, 2),
             'change_percentage': round(price_change * 100, 1),
-            'confidence': random.randint(75, 95)
+            'confidence': rng.randint(75, 95)
         })
         
         # Update current price for next week's calculation
@@ -125,7 +261,7 @@ def get_price_predictions(crop_name):
         
         # Add some randomness to factors for next week
         for key in factors:
-            factors[key] += random.uniform(-0.05, 0.05)
+            factors[key] += rng.uniform(-0.05, 0.05)
     
     return {
         'crop_name': crop['name'],
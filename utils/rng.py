@@ -0,0 +1,22 @@
+import hashlib
+import os
+import random
+from datetime import date
+
+# Base seed mixed into every generator; change it to draw a different,
+# equally reproducible set of outputs (e.g. one per A/B benchmark arm)
+BASE_SEED = os.getenv("SAMA_RNG_SEED", "sama")
+
+def seed_for(*parts):
+    """Get a 64-bit seed from any parts, stable across processes unlike hash()"""
+    key = "|".join(str(part) for part in (BASE_SEED,) + parts)
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], 'big')
+
+def daily_rng(*parts, day=None):
+    """Get a random.Random seeded by parts and the day, so its draws repeat until the date changes"""
+    day = day or date.today()
+    return random.Random(seed_for(day.isoformat(), *parts))
+
+def user_rng(user, purpose, day=None):
+    """Get the generator of one user's outputs for a purpose (e.g. 'tips') on a day"""
+    return daily_rng(purpose, user.get('email') or '', user.get('location', ''), user.get('type'), day=day)
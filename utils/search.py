@@ -0,0 +1,259 @@
+import bisect
+import math
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def normalize_text(text):
+    """Lowercase text and strip accents, so 'Maïs' and 'mais' compare equal"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def tokenize(text):
+    """Split text into normalized word tokens"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+def trigrams(term):
+    """Get the character trigrams of a term, padded so its ends count"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """Get the edit distance of two terms counting a swap of adjacent letters as one edit.
+
+    Returns limit + 1 as soon as the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def normalize_query(text):
+    """Get the canonical form of a search query, so equivalent queries share cache entries"""
+    return " ".join(tokenize(text))
+
+class TrigramIndex:
+    """Maps character trigrams to the vocabulary terms containing them.
+
+    Used to find close spellings of a misspelled query word. Lookups walk
+    the rarest trigrams first and stop after max_scan candidate terms, so
+    their cost is bounded however large the vocabulary grows. Candidates
+    match on trigram (Dice) similarity, or on being one edit away (two for
+    long words), which catches swapped letters such as "miaze" that share
+    few trigrams with the intended word. Short words can share none (e.g.
+    "rcie" and "rice"), so terms with the same first letter and a length
+    within one are candidates too.
+    """
+
+    def __init__(self, max_scan=5000):
+        self.max_scan = max_scan
+        self.grams = {}
+        self.initials = {}
+
+    def add(self, term):
+        """Index a new vocabulary term"""
+        for gram in trigrams(term):
+            self.grams.setdefault(gram, []).append(term)
+        self.initials.setdefault((term[:1], len(term)), []).append(term)
+
+    def similar(self, term, threshold=0.4, limit=5):
+        """Get up to limit [(term, similarity)] pairs, most similar first"""
+        query = trigrams(term)
+        lists = sorted((self.grams.get(gram, ()) for gram in query), key=len)
+
+        shared = {}
+        scanned = 0
+        for terms in lists:
+            if scanned and scanned + len(terms) > self.max_scan:
+                break
+            scanned += len(terms)
+            for candidate in terms:
+                shared[candidate] = shared.get(candidate, 0) + 1
+        for length in (len(term) - 1, len(term), len(term) + 1):
+            for candidate in self.initials.get((term[:1], length), ())[:self.max_scan]:
+                shared.setdefault(candidate, 0)
+
+        max_edits = 2 if len(term) >= 8 else 1
+        matches = []
+        for candidate, count in shared.items():
+            # Dice coefficient of the two trigram sets
+            similarity = 2 * count / (len(query) + len(trigrams(candidate)))
+            if similarity < threshold:
+                distance = edit_distance(term, candidate, max_edits)
+                if distance <= max_edits:
+                    similarity = max(similarity, 1 - distance / max(len(term), len(candidate)))
+            if similarity >= threshold:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+class InvertedIndex:
+    """In-memory inverted index with BM25 ranking and prefix matching.
+
+    Documents are dicts indexed over the given fields (field -> weight) and
+    can be added one at a time as the catalog grows. Per-token score maps are
+    cached between adds, so repeated and search-as-you-type queries only pay
+    for intersecting them.
+
+    synonyms maps a phrase to alternative phrases (e.g. a crop name to its
+    local names); documents containing the phrase are also indexed under the
+    alternatives. With fuzzy on, a query word that matches nothing falls back
+    to similarly spelled terms from a trigram index.
+    """
+
+    def __init__(self, fields, k1=1.2, b=0.75, min_prefix=2, max_expansions=50, cache_size=1024,
+                 synonyms=None, fuzzy=True):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.min_prefix = min_prefix
+        self.max_expansions = max_expansions
+        self.postings = {}
+        self.doc_lengths = {}
+        self.total_length = 0.0
+        self._terms = []
+        self._new_terms = []
+        self.cache_size = cache_size
+        self._token_scores = {}
+        self.trigrams = TrigramIndex() if fuzzy else None
+
+        # Synonym phrases keyed by their first token, for matching while indexing
+        self._synonyms = {}
+        for phrase, alternatives in (synonyms or {}).items():
+            phrase_tokens = tuple(tokenize(phrase))
+            if not phrase_tokens:
+                continue
+            alternative_tokens = [t for alternative in alternatives for t in tokenize(alternative)]
+            self._synonyms.setdefault(phrase_tokens[0], []).append((phrase_tokens, alternative_tokens))
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, doc):
+        """Index a document under doc_id"""
+        frequencies = {}
+        for field, weight in self.fields.items():
+            tokens = tokenize(doc.get(field) or "")
+            for token in tokens + self._synonym_tokens(tokens):
+                frequencies[token] = frequencies.get(token, 0) + weight
+
+        for token, frequency in frequencies.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                self._new_terms.append(token)
+                if self.trigrams is not None:
+                    self.trigrams.add(token)
+            postings[doc_id] = frequency
+
+        # Document count and average length changed, so cached scores are stale
+        self._token_scores = {}
+        length = sum(frequencies.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def _synonym_tokens(self, tokens):
+        """Get the alternative tokens of every synonym phrase found in tokens"""
+        found = []
+        if not self._synonyms:
+            return found
+        for i, token in enumerate(tokens):
+            for phrase_tokens, alternative_tokens in self._synonyms.get(token, ()):
+                if tuple(tokens[i:i + len(phrase_tokens)]) == phrase_tokens:
+                    found.extend(alternative_tokens)
+        return found
+
+    def prepare(self):
+        """Merge newly added terms into the sorted vocabulary used for prefix lookups"""
+        if self._new_terms:
+            # A few new terms are inserted in place; a bulk load re-sorts once
+            if len(self._new_terms) < 1000:
+                for term in self._new_terms:
+                    bisect.insort(self._terms, term)
+            else:
+                self._terms = sorted(self.postings)
+            self._new_terms = []
+
+    def expand(self, token, prefix=True):
+        """Get indexed terms matching a query token exactly or as a prefix"""
+        if not prefix or len(token) < self.min_prefix:
+            return [token] if token in self.postings else []
+
+        self.prepare()
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + "￿")
+        return self._terms[start:min(end, start + self.max_expansions)]
+
+    def match_terms(self, token, prefix=True):
+        """Get [(term, weight)] for a query token: exact and prefix matches, else close spellings"""
+        terms = self.expand(token, prefix)
+        if terms:
+            return [(term, 1.0) for term in terms]
+        if self.trigrams is not None and len(token) >= 3:
+            return self.trigrams.similar(token)
+        return []
+
+    def token_scores(self, token, prefix=True, docs=None):
+        """Get {doc_id: BM25 score} for one query token, through its best matching term.
+
+        Scores for every matching document are cached until the next add;
+        passing docs scores just those documents without caching.
+        """
+        key = (token, prefix)
+        scores = self._token_scores.get(key)
+        if scores is not None:
+            return scores
+
+        doc_count = len(self.doc_lengths)
+        average_length = self.total_length / doc_count
+        k1, b = self.k1, self.b
+        scores = {}
+        for term, weight in self.match_terms(token, prefix):
+            postings = self.postings[term]
+            idf = weight * math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            matched = postings if docs is None else postings.keys() & docs
+            for doc_id in matched:
+                frequency = postings[doc_id]
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / average_length)
+                score = idf * frequency * (k1 + 1) / (frequency + norm)
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+
+        if docs is None:
+            if len(self._token_scores) >= self.cache_size:
+                self._token_scores = {}
+            self._token_scores[key] = scores
+        return scores
+
+    def document_frequency(self, token, prefix=True):
+        """Get how many postings a query token expands to"""
+        return sum(len(self.postings[term]) for term, weight in self.match_terms(token, prefix))
+
+    def search(self, query, prefix=True):
+        """Get {doc_id: score} for documents matching every query token"""
+        tokens = tokenize(query)
+        if not tokens or not self.doc_lengths:
+            return {}
+
+        # Start from the rarest token; much commoner ones only score its matches
+        frequencies = {t: self.document_frequency(t, prefix) for t in tokens}
+        tokens = sorted(frequencies, key=frequencies.get)
+        results = dict(self.token_scores(tokens[0], prefix))
+        for token in tokens[1:]:
+            if not results:
+                break
+            docs = results.keys() if frequencies[token] > 4 * len(results) else None
+            scores = self.token_scores(token, prefix, docs=docs)
+            results = {d: s + scores[d] for d, s in results.items() if d in scores}
+        return results
@@ -0,0 +1,61 @@
+import json
+import os
+
+# Optional accelerated serializers; the stdlib json module is always available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# json:    pretty-printed stdlib JSON (the original data/ file format)
+# orjson:  compact JSON written with orjson (falls back to compact stdlib JSON)
+# msgpack: binary MessagePack snapshots (falls back to orjson when not installed)
+FORMATS = ['json', 'orjson', 'msgpack']
+
+# First bytes of a MessagePack map or array, which can never start a JSON document
+_MSGPACK_MARKERS = set(range(0x80, 0xa0)) | {0xdc, 0xdd, 0xde, 0xdf}
+
+def get_format(fmt=None):
+    """Resolve a format name (default from SAMA_SERIALIZER) to one that is installed"""
+    fmt = (fmt or os.getenv("SAMA_SERIALIZER", "json")).lower()
+    if fmt == 'msgpack' and msgpack is None:
+        fmt = 'orjson'
+    if fmt not in FORMATS:
+        fmt = 'json'
+    return fmt
+
+def dumps(data, fmt=None):
+    """Serialize a snapshot to bytes in the selected format"""
+    fmt = get_format(fmt)
+    if fmt == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True)
+    if fmt == 'orjson':
+        return dumps_compact(data)
+    return json.dumps(data, indent=2).encode()
+
+def loads(raw):
+    """Deserialize a snapshot, detecting JSON or MessagePack from its first byte"""
+    if not raw:
+        raise ValueError("Empty data")
+    if raw[0] in _MSGPACK_MARKERS:
+        if msgpack is None:
+            raise ValueError("Data is MessagePack but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    return loads_json(raw)
+
+def dumps_compact(data):
+    """Serialize to single-line JSON bytes, as used for log lines and SQLite rows"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def loads_json(raw):
+    """Parse JSON text or bytes"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,523 @@
+import os
+import sqlite3
+import itertools
+import threading
+from contextlib import contextmanager, nullcontext
+from utils.filestore import file_lock, read_data, write_data_atomic
+from utils.ids import IdAllocator
+from utils.journal import AppendLog
+from utils.pool import ConnectionPool
+from utils.serializers import dumps_compact, loads_json
+
+DATA_DIR = "data"
+
+# Collections stored by the platform and the fields each one is looked up by
+COLLECTIONS = {
+    'products': ['seller_email'],
+    'messages': ['from', 'to'],
+    'transactions': ['buyer_email', 'seller_email'],
+    'users': ['email'],
+    'payment_logs': ['transaction_id'],
+    'refund_logs': ['original_transaction_id'],
+    'recommendations': ['email'],
+}
+
+# Process-wide write counter used to version collections
+_write_counter = itertools.count(1)
+
+# History-style collections that are only ever appended to
+LOG_COLLECTIONS = ['messages', 'payment_logs', 'refund_logs']
+
+def collection_path(collection, data_dir=DATA_DIR):
+    """Get the JSON file path for a collection"""
+    return os.path.join(data_dir, f"{collection}.json")
+
+def file_signature(path):
+    """Get (mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class RecordIndex:
+    """In-memory records of a collection with hash indexes on its lookup fields.
+
+    Each index maps a field value (e.g. an email) to the positions of the
+    matching records, so lookups cost O(k) in the number of matches.
+    """
+
+    def __init__(self, records, fields):
+        self.records = []
+        self.fields = fields
+        self.index = {field: {} for field in fields}
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        """Append a record and index it"""
+        position = len(self.records)
+        self.records.append(record)
+        for field in self.fields:
+            value = record.get(field)
+            if value is not None:
+                self.index[field].setdefault(value, []).append(position)
+
+    def find(self, fields, value):
+        """Get records where any of the given fields equals value, in store order"""
+        positions = set()
+        for field in fields:
+            positions.update(self.index[field].get(value, ()))
+        return [self.records[p] for p in sorted(positions)]
+
+class JsonBackend:
+    """Whole-file storage, one data/<collection>.json array per collection.
+
+    Files are written in the format chosen by SAMA_SERIALIZER (pretty JSON by
+    default, compact orjson or binary msgpack) and read in whichever format
+    they are in. Collections listed in log_collections are kept in append-only log mode
+    (see utils/journal.py) so adding a record does not rewrite the file.
+    """
+
+    name = 'json'
+
+    def __init__(self, data_dir=DATA_DIR, log_collections=LOG_COLLECTIONS):
+        self.data_dir = data_dir
+        self.log_collections = set(log_collections)
+        self._logs = {}
+        self._registry_lock = threading.Lock()
+        self._allocators = {}
+        self._versions = {}
+
+    def session(self):
+        """No connections to pin for file storage; kept for interface parity"""
+        return nullcontext()
+
+    def _allocator(self, collection):
+        """Get the id allocator of a collection, seeded from its highest existing id"""
+        with self._registry_lock:
+            if collection not in self._allocators:
+                def highest_id():
+                    try:
+                        return max((r.get('id') or 0 for r in self.load_all(collection)), default=0)
+                    except (OSError, ValueError, TypeError):
+                        return 0
+
+                seq_path = os.path.join(self.data_dir, f"{collection}.seq")
+                self._allocators[collection] = IdAllocator(seq_path, seed=highest_id)
+            return self._allocators[collection]
+
+    def _log(self, collection):
+        """Get the append log of a log-mode collection, or None"""
+        if collection not in self.log_collections:
+            return None
+        with self._registry_lock:
+            if collection not in self._logs:
+                self._logs[collection] = AppendLog(collection_path(collection, self.data_dir))
+            return self._logs[collection]
+
+    def version(self, collection):
+        """Get a token that changes whenever the collection is written.
+
+        Combines this process's write counter with the files' mtime and size
+        so writes made by other processes are noticed too.
+        """
+        log = self._log(collection)
+        paths = [log.snapshot_path, log.log_path] if log else [collection_path(collection, self.data_dir)]
+        return (self._versions.get(collection, 0),) + tuple(file_signature(p) for p in paths)
+
+    def exists(self, collection):
+        """Check whether a collection has been created"""
+        log = self._log(collection)
+        if log:
+            return log.exists()
+        return os.path.exists(collection_path(collection, self.data_dir))
+
+    def load_all(self, collection):
+        """Load every record of a collection"""
+        log = self._log(collection)
+        if log:
+            return log.read_all()
+
+        return read_data(collection_path(collection, self.data_dir), [])
+
+    def find(self, collection, fields, value):
+        """Get records where any of the given fields equals value"""
+        return [r for r in self.load_all(collection) if any(r.get(field) == value for field in fields)]
+
+    def iter_all(self, collection):
+        """Iterate over every record of a collection"""
+        return iter(self.load_all(collection))
+
+    def read_after(self, collection, cursor=None):
+        """Get (records, cursor, reset) for the records added since cursor.
+
+        Log-mode collections read only their new log lines. Whole-file
+        collections are parsed in full and sliced past the records already
+        seen, provided the last one seen is still in its place. reset is
+        True when every record is returned instead, because there was no
+        cursor or the collection was rewritten.
+        """
+        log = self._log(collection)
+        if log:
+            return log.read_after(cursor)
+        records = self.load_all(collection)
+        new_cursor = (len(records), records[-1] if records else None)
+        if cursor is not None:
+            count, last = cursor
+            if len(records) >= count and (not count or records[count - 1] == last):
+                return records[count:], new_cursor, False
+        return records, new_cursor, True
+
+    def insert(self, collection, record, unique=None):
+        """Append a record, assigning the next id if it has none.
+
+        With unique set to a field name, nothing is written and None is
+        returned when a record with the same value already exists.
+        """
+        # Ids come from the allocator, taken before the store lock
+        if 'id' not in record:
+            record = {'id': self._allocator(collection).next_id(), **record}
+
+        inserted = self.insert_many(collection, [record], unique)
+        return inserted[0] if inserted else None
+
+    def insert_many(self, collection, records, unique=None, with_version=False):
+        """Insert records with a single locked write, assigning ids to those without one.
+
+        With unique set to a field name, records whose value already exists
+        (in the store or earlier in the batch) are skipped. Returns the
+        records that were inserted, or with with_version set, those records
+        and the collection's version seen under the lock before writing.
+        """
+        path = collection_path(collection, self.data_dir)
+        log = self._log(collection)
+
+        records = list(records)
+        missing = sum('id' not in r for r in records)
+        if missing:
+            ids = iter(self._allocator(collection).reserve(missing))
+            records = [r if 'id' in r else {'id': next(ids), **r} for r in records]
+
+        with file_lock(path):
+            before = self.version(collection) if with_version else None
+            if log and not unique:
+                log.extend(records)
+                inserted = records
+            else:
+                # A store that cannot be decoded (e.g. a msgpack file without
+                # msgpack installed) raises here rather than being overwritten
+                existing = self.load_all(collection)
+
+                inserted = records
+                if unique:
+                    seen = {r.get(unique) for r in existing}
+                    inserted = []
+                    for record in records:
+                        if record.get(unique) not in seen:
+                            seen.add(record.get(unique))
+                            inserted.append(record)
+
+                if inserted:
+                    self._write(collection, existing + inserted)
+
+        if inserted:
+            self._bump(collection)
+        return (inserted, before) if with_version else inserted
+
+    def update(self, collection, field, value, apply):
+        """Apply a change to the first record where field equals value.
+
+        Returns False when no record matched.
+        """
+        with file_lock(collection_path(collection, self.data_dir)):
+            records = self.load_all(collection)
+            for record in records:
+                if record.get(field) == value:
+                    apply(record)
+                    self._write(collection, records)
+                    self._bump(collection)
+                    return True
+        return False
+
+    def replace_all(self, collection, records):
+        """Overwrite a collection with the given records"""
+        with file_lock(collection_path(collection, self.data_dir)):
+            self._write(collection, records)
+        self._bump(collection)
+
+    def _write(self, collection, records):
+        """Atomically write a whole collection (caller holds the file lock)"""
+        log = self._log(collection)
+        if log:
+            log.rewrite(records)
+        else:
+            write_data_atomic(collection_path(collection, self.data_dir), records)
+
+    def _bump(self, collection):
+        self._versions[collection] = next(_write_counter)
+
+class SQLiteBackend:
+    """SQLite storage in WAL mode with primary-key and per-field secondary indexes.
+
+    Connections come from a process-wide pool (see utils/pool.py) instead of
+    being opened per call or per Streamlit script thread.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path=None, data_dir=DATA_DIR, migrate=True, pool_size=None):
+        self.data_dir = data_dir
+        self.db_path = db_path or os.path.join(data_dir, "sama.db")
+        self.migrate = migrate
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._versions = {}
+        self.pool = ConnectionPool(
+            self._connect,
+            max_size=pool_size or int(os.getenv("SAMA_DB_POOL_SIZE", "8"))
+        )
+
+    def _connect(self):
+        """Open a new connection, creating the schema on first use"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._schema_lock:
+            if not self._schema_ready:
+                create_schema(conn)
+                if self.migrate:
+                    migrate_json_to_sqlite(conn, self.data_dir)
+                self._schema_ready = True
+        return conn
+
+    def session(self):
+        """Pin one pooled connection to this thread for several storage calls"""
+        return self.pool.connection()
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block as one write transaction on a pooled connection"""
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def version(self, collection):
+        """Get a token that changes whenever the database is written"""
+        return (
+            self._versions.get(collection, 0),
+            file_signature(self.db_path),
+            file_signature(self.db_path + "-wal")
+        )
+
+    def exists(self, collection):
+        """Check whether a collection holds any records"""
+        with self.pool.connection() as conn:
+            return conn.execute(f'SELECT 1 FROM "{collection}" LIMIT 1').fetchone() is not None
+
+    def load_all(self, collection):
+        """Load every record of a collection in id order"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT data FROM "{collection}" ORDER BY id')
+            return [loads_json(data) for (data,) in rows]
+
+    def find(self, collection, fields, value):
+        """Get records where any of the given fields equals value, using the field indexes"""
+        where = " OR ".join(f'"{field}" = ?' for field in fields)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT data FROM "{collection}" WHERE {where} ORDER BY id',
+                [value] * len(fields)
+            )
+            return [loads_json(data) for (data,) in rows]
+
+    def read_after(self, collection, cursor=None):
+        """Get (records, cursor, reset) for the records added since cursor.
+
+        The cursor is the last id read, the number of rows up to it and that
+        row's data; if either has changed the collection was rewritten, and
+        every record is returned with reset True.
+        """
+        with self.pool.connection() as conn:
+            if cursor is not None:
+                last_id, count, last_data = cursor
+                (current,) = conn.execute(f'SELECT COUNT(*) FROM "{collection}" WHERE id <= ?', [last_id]).fetchone()
+                row = conn.execute(f'SELECT data FROM "{collection}" WHERE id = ?', [last_id]).fetchone()
+                if current == count and (row[0] if row else None) == last_data:
+                    rows = conn.execute(f'SELECT id, data FROM "{collection}" WHERE id > ? ORDER BY id', [last_id]).fetchall()
+                    records = [loads_json(data) for _, data in rows]
+                    new_cursor = (rows[-1][0], count + len(rows), rows[-1][1]) if rows else cursor
+                    return records, new_cursor, False
+            rows = conn.execute(f'SELECT id, data FROM "{collection}" ORDER BY id').fetchall()
+            new_cursor = (rows[-1][0], len(rows), rows[-1][1]) if rows else (0, 0, None)
+            return [loads_json(data) for _, data in rows], new_cursor, True
+
+    def iter_all(self, collection):
+        """Iterate over every record of a collection without loading it all"""
+        with self.pool.connection() as conn:
+            for (data,) in conn.execute(f'SELECT data FROM "{collection}" ORDER BY id'):
+                yield loads_json(data)
+
+    def insert(self, collection, record, unique=None):
+        """Insert a record, assigning the next id if it has none.
+
+        With unique set to a field name, nothing is written and None is
+        returned when a record with the same value already exists.
+        """
+        inserted = self.insert_many(collection, [record], unique)
+        return inserted[0] if inserted else None
+
+    def insert_many(self, collection, records, unique=None, with_version=False):
+        """Insert records in one transaction, assigning ids to those without one.
+
+        With unique set to a field name, records whose value already exists
+        (in the store or earlier in the batch) are skipped. Returns the
+        records that were inserted, or with with_version set, those records
+        and the collection's version seen inside the transaction before writing.
+        """
+        with self._transaction() as conn:
+            before = self.version(collection) if with_version else None
+            inserted = []
+            seen = set()
+            (next_id,) = conn.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{collection}"').fetchone()
+            for record in records:
+                if unique:
+                    value = record.get(unique)
+                    if value in seen or _select_data(conn, collection, unique, value) is not None:
+                        continue
+                    seen.add(value)
+                if 'id' not in record:
+                    record = {'id': next_id, **record}
+                    next_id += 1
+                inserted.append(record)
+
+            _insert_rows(conn, collection, inserted)
+
+        if inserted:
+            self._bump(collection)
+        return (inserted, before) if with_version else inserted
+
+    def update(self, collection, field, value, apply):
+        """Apply a change to the first record where field equals value.
+
+        Returns False when no record matched.
+        """
+        with self._transaction() as conn:
+            row = _select_data(conn, collection, field, value)
+            if row is None:
+                return False
+
+            row_id, data = row
+            record = loads_json(data)
+            apply(record)
+            fields = COLLECTIONS[collection]
+            assignments = "".join(f', "{f}" = ?' for f in fields)
+            conn.execute(
+                f'UPDATE "{collection}" SET data = ?{assignments} WHERE id = ?',
+                [dumps_compact(record).decode()] + [record.get(f) for f in fields] + [row_id]
+            )
+
+        self._bump(collection)
+        return True
+
+    def replace_all(self, collection, records):
+        """Overwrite a collection with the given records in one transaction"""
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM "{collection}"')
+            _insert_rows(conn, collection, records)
+        self._bump(collection)
+
+    def _bump(self, collection):
+        self._versions[collection] = next(_write_counter)
+
+def create_schema(conn):
+    """Create one table per collection with an index on every lookup field"""
+    for collection, fields in COLLECTIONS.items():
+        columns = "".join(f', "{field}" TEXT' for field in fields)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{collection}" (id INTEGER PRIMARY KEY{columns}, data TEXT NOT NULL)')
+        for field in fields:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{collection}_{field}" ON "{collection}" ("{field}")')
+    conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at TEXT)")
+
+def _select_data(conn, collection, field, value):
+    """Get (id, data) of the first row where field equals value"""
+    return conn.execute(
+        f'SELECT id, data FROM "{collection}" WHERE "{field}" = ? ORDER BY id LIMIT 1',
+        [value]
+    ).fetchone()
+
+def _insert_rows(conn, collection, records):
+    """Insert records into a collection table (caller owns the transaction)"""
+    fields = COLLECTIONS[collection]
+    columns = "".join(f', "{field}"' for field in fields)
+    placeholders = ", ?" * (len(fields) + 1)
+    conn.executemany(
+        f'INSERT INTO "{collection}" (id{columns}, data) VALUES (?{placeholders})',
+        ([r.get('id')] + [r.get(field) for field in fields] + [dumps_compact(r).decode()] for r in records)
+    )
+
+def migrate_json_to_sqlite(conn, data_dir=DATA_DIR):
+    """One-shot import of the existing data/*.json files into SQLite.
+
+    The check and the import share one write transaction, so when several
+    processes open a fresh database only the first one imports.
+    """
+    source = JsonBackend(data_dir)
+    imported = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM migrations WHERE name = 'json_import'").fetchone():
+            conn.execute("COMMIT")
+            return {}
+
+        for collection in COLLECTIONS:
+            if not source.exists(collection):
+                continue
+            try:
+                records = source.load_all(collection)
+            except ValueError:
+                continue
+
+            _insert_rows(conn, collection, records)
+            imported[collection] = len(records)
+
+        conn.execute(
+            "INSERT INTO migrations (name, applied_at) VALUES ('json_import', datetime('now'))"
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return imported
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Get the process-wide storage backend selected by SAMA_STORAGE_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if os.getenv("SAMA_STORAGE_BACKEND", "json").lower() == "sqlite":
+                    _backend = SQLiteBackend()
+                else:
+                    _backend = JsonBackend()
+    return _backend
+
+def get_pool_stats():
+    """Get connection pool metrics of the storage backend, or None if it has no pool"""
+    pool = getattr(get_backend(), 'pool', None)
+    return pool.stats() if pool is not None else None
+
+def set_backend(backend):
+    """Replace the process-wide storage backend (used by scripts and benchmarks)"""
+    global _backend
+    _backend = backend
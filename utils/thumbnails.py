@@ -0,0 +1,198 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from utils.cache import LRUCache
+from utils.storage import DATA_DIR
+
+THUMBNAIL_DIR = os.getenv("SAMA_THUMBNAIL_DIR", os.path.join(DATA_DIR, "thumbnails"))
+
+# Disk budget for cached thumbnails; least recently used files go first
+THUMBNAIL_CACHE_BYTES = int(float(os.getenv("SAMA_THUMBNAIL_CACHE_MB", "64")) * 1024 * 1024)
+
+FETCH_TIMEOUT = 5
+
+# Hosts remote images may be downloaded from, e.g. "images.example.com,cdn.example.com".
+# Image URLs on any other host are never requested by the server; the
+# browser loads them directly instead.
+THUMBNAIL_HOSTS = {h.strip().lower() for h in os.getenv("SAMA_THUMBNAIL_HOSTS", "").split(",") if h.strip()}
+
+# Downloads larger than this are abandoned
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Background colours for generated placeholders, picked by label
+PLACEHOLDER_COLORS = ['#2e7d32', '#558b2f', '#9e9d24', '#ef6c00', '#6d4c41', '#00838f']
+
+_evict_lock = threading.Lock()
+
+# Remote images are downloaded here, off the Streamlit render path
+_fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='thumbnails')
+_fetching = set()
+_fetch_lock = threading.Lock()
+
+# URLs whose download failed recently, so they are not retried on every render
+_failed_urls = LRUCache(maxsize=1024, ttl=3600)
+
+def thumbnail_path(url, size, label=None):
+    """Get the cache file path of a thumbnail at a size.
+
+    Remote images are keyed by URL; placeholders (no URL, a placeholder
+    service URL, or a host that is not allowed) by the label they show.
+    """
+    key = f"{url}|{size[0]}x{size[1]}" if url else f"placeholder|{label}|{size[0]}x{size[1]}"
+    return os.path.join(THUMBNAIL_DIR, f"{hashlib.sha1(key.encode()).hexdigest()}.webp")
+
+def get_thumbnail(url, size=(250, 200), label=None):
+    """Get a cached WebP thumbnail path for an image URL, or the URL itself for st.image.
+
+    Only URLs on THUMBNAIL_HOSTS are downloaded, and only in the background;
+    until the download lands (or when it fails), and for http(s) URLs on
+    other hosts, the URL is returned for the browser to load. Missing,
+    placeholder-service and non-web URLs get a locally drawn placeholder
+    with label. Rendering never waits on the network.
+    """
+    label = label or _placeholder_text(url)
+    if url and _is_remote_image(url):
+        if _is_allowed(url):
+            path = thumbnail_path(url, size)
+            if _touch(path):
+                return path
+            _schedule_fetch(url, size)
+        return url
+
+    path = thumbnail_path(None, size, label)
+    if not _touch(path):
+        _save_atomic(ImageOps.fit(render_placeholder(size, label), size), path)
+        evict()
+    return path
+
+def _touch(path):
+    """Mark a cached thumbnail as recently used for eviction, or get False when it is missing"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _is_remote_image(url):
+    """Check whether a URL is an http(s) image, not a placeholder service or a local path"""
+    return urlparse(url).scheme in ('http', 'https') and not _is_placeholder(url)
+
+def _is_allowed(url):
+    """Check whether a remote image URL is on a host the server may download from"""
+    return (urlparse(url).hostname or '').lower() in THUMBNAIL_HOSTS
+
+def _schedule_fetch(url, size):
+    """Queue a background download of an image into the thumbnail cache"""
+    key = (url, size)
+    with _fetch_lock:
+        if key in _fetching or _failed_urls.peek(url):
+            return
+        _fetching.add(key)
+    _fetch_pool.submit(_fetch_thumbnail, url, size)
+
+def _fetch_thumbnail(url, size):
+    """Download an image and save its thumbnail (runs on the fetch pool)"""
+    try:
+        image = _fetch_image(url)
+        if image is None:
+            _failed_urls.set(url, True)
+        else:
+            _save_atomic(ImageOps.fit(image.convert('RGB'), size), thumbnail_path(url, size))
+            evict()
+    finally:
+        with _fetch_lock:
+            _fetching.discard((url, size))
+
+def _is_placeholder(url):
+    """Check whether a URL points at a placeholder image service"""
+    return 'placeholder.com' in (urlparse(url).hostname or '')
+
+def _placeholder_text(url):
+    """Get the text= parameter of a placeholder URL"""
+    if not url:
+        return ""
+    return parse_qs(urlparse(url).query).get('text', [""])[0]
+
+def _fetch_image(url):
+    """Download and decode an image of at most MAX_IMAGE_BYTES, or None when that fails"""
+    try:
+        # Redirects could lead off the allowed hosts
+        with requests.get(url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False) as response:
+            response.raise_for_status()
+            if int(response.headers.get('Content-Length') or 0) > MAX_IMAGE_BYTES:
+                return None
+            data = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                data.extend(chunk)
+                if len(data) > MAX_IMAGE_BYTES:
+                    return None
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+    except (requests.RequestException, OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+def render_placeholder(size, text):
+    """Draw a solid placeholder image with centred text"""
+    color = PLACEHOLDER_COLORS[int(hashlib.md5(text.encode()).hexdigest(), 16) % len(PLACEHOLDER_COLORS)]
+    image = Image.new('RGB', size, color)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=max(12, size[1] // 8))
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    position = ((size[0] - (right - left)) / 2 - left, (size[1] - (bottom - top)) / 2 - top)
+    draw.text(position, text, fill='white', font=font)
+    return image
+
+def _save_atomic(image, path):
+    """Write an image as WebP through a temp file and rename"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, 'WEBP', quality=80, method=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def evict(max_bytes=None):
+    """Delete least recently used thumbnails until the cache fits its disk budget.
+
+    Returns the number of files removed.
+    """
+    max_bytes = THUMBNAIL_CACHE_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        try:
+            entries = [e for e in os.scandir(THUMBNAIL_DIR) if e.name.endswith('.webp')]
+        except FileNotFoundError:
+            return 0
+
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -61,6 +61,7 @@ TRANSLATIONS = {
         'sort_by': 'Sort By',
         'price_low_high': 'Price: Low to High',
         'price_high_low': 'Price: High to Low',
+        'distance': 'Distance',
         'rating': 'Rating',
         'products_found': 'products found',
         'quantity': 'Quantity (kg)',
@@ -202,6 +203,7 @@ TRANSLATIONS = {
         'sort_by': 'Trier par',
         'price_low_high': 'Prix: Bas à Élevé',
         'price_high_low': 'Prix: Élevé à Bas',
+        'distance': 'Distance',
         'rating': 'Évaluation',
         'products_found': 'produits trouvés',
         'quantity': 'Quantité (kg)',
@@ -266,6 +268,45 @@ TRANSLATIONS = {
     }
 }
 
+# Local names of the crops in data/crops.py, used for display and as search synonyms
+CROP_NAME_TRANSLATIONS = {
+    'Maize': {'fr': 'Maïs', 'pt': 'Milho', 'sw': 'Mahindi', 'ha': 'Masara'},
+    'Rice': {'fr': 'Riz', 'pt': 'Arroz', 'sw': 'Mchele', 'ha': 'Shinkafa'},
+    'Millet': {'fr': 'Mil', 'pt': 'Milheto', 'sw': 'Uwele', 'ha': 'Gero'},
+    'Sorghum': {'fr': 'Sorgho', 'pt': 'Sorgo', 'sw': 'Mtama', 'ha': 'Dawa'},
+    'Teff': {'fr': 'Teff', 'pt': 'Tefe', 'sw': 'Tefu', 'ha': 'Tef'},
+    'Cassava': {'fr': 'Manioc', 'pt': 'Mandioca', 'sw': 'Muhogo', 'ha': 'Rogo'},
+    'Yam': {'fr': 'Igname', 'pt': 'Inhame', 'sw': 'Kiazi kikuu', 'ha': 'Doya'},
+    'Sweet Potato': {'fr': 'Patate douce', 'pt': 'Batata-doce', 'sw': 'Viazi vitamu', 'ha': 'Dankali'},
+    'Irish Potato': {'fr': 'Pomme de terre', 'pt': 'Batata', 'sw': 'Viazi mviringo', 'ha': 'Dankalin turawa'},
+    'Cowpeas': {'fr': 'Niébé', 'pt': 'Feijão-frade', 'sw': 'Kunde', 'ha': 'Wake'},
+    'Groundnuts': {'fr': 'Arachide', 'pt': 'Amendoim', 'sw': 'Karanga', 'ha': 'Gyada'},
+    'Black-eyed Peas': {'fr': 'Haricot à œil noir', 'pt': 'Feijão-fradinho', 'sw': 'Kunde', 'ha': 'Wake'},
+    'Bambara Nuts': {'fr': 'Pois bambara', 'pt': 'Jinguba', 'sw': 'Njugu mawe', 'ha': 'Gurjiya'},
+    'Tomatoes': {'fr': 'Tomates', 'pt': 'Tomates', 'sw': 'Nyanya', 'ha': 'Tumatir'},
+    'Onions': {'fr': 'Oignons', 'pt': 'Cebolas', 'sw': 'Vitunguu', 'ha': 'Albasa'},
+    'Cabbage': {'fr': 'Chou', 'pt': 'Repolho', 'sw': 'Kabichi', 'ha': 'Kabeji'},
+    'Spinach': {'fr': 'Épinards', 'pt': 'Espinafre', 'sw': 'Mchicha', 'ha': 'Alayyahu'},
+    'Okra': {'fr': 'Gombo', 'pt': 'Quiabo', 'sw': 'Bamia', 'ha': 'Kubewa'},
+    'Mangoes': {'fr': 'Mangues', 'pt': 'Mangas', 'sw': 'Maembe', 'ha': 'Mangwaro'},
+    'Bananas': {'fr': 'Bananes', 'pt': 'Bananas', 'sw': 'Ndizi', 'ha': 'Ayaba'},
+    'Oranges': {'fr': 'Oranges', 'pt': 'Laranjas', 'sw': 'Machungwa', 'ha': 'Lemu'},
+    'Pineapples': {'fr': 'Ananas', 'pt': 'Abacaxis', 'sw': 'Nanasi', 'ha': 'Abarba'},
+    'Papayas': {'fr': 'Papayes', 'pt': 'Mamões', 'sw': 'Mapapai', 'ha': 'Gwanda'},
+    'Coffee Beans': {'fr': 'Grains de café', 'pt': 'Grãos de café', 'sw': 'Kahawa', 'ha': 'Kofi'},
+    'Cocoa Beans': {'fr': 'Fèves de cacao', 'pt': 'Amêndoas de cacau', 'sw': 'Kakao', 'ha': 'Koko'},
+    'Cotton': {'fr': 'Coton', 'pt': 'Algodão', 'sw': 'Pamba', 'ha': 'Auduga'},
+    'Sesame': {'fr': 'Sésame', 'pt': 'Gergelim', 'sw': 'Ufuta', 'ha': 'Ridi'},
+    'Ginger': {'fr': 'Gingembre', 'pt': 'Gengibre', 'sw': 'Tangawizi', 'ha': 'Citta'},
+    'Turmeric': {'fr': 'Curcuma', 'pt': 'Açafrão-da-terra', 'sw': 'Manjano', 'ha': 'Gangamau'},
+    'Black Pepper': {'fr': 'Poivre noir', 'pt': 'Pimenta-do-reino', 'sw': 'Pilipili manga', 'ha': 'Masoro'},
+    'Chili Peppers': {'fr': 'Piments', 'pt': 'Pimentas', 'sw': 'Pilipili hoho', 'ha': 'Barkono'},
+    'Plantains': {'fr': 'Bananes plantains', 'pt': 'Bananas-da-terra', 'sw': 'Ndizi mbichi', 'ha': 'Agade'},
+    'Avocados': {'fr': 'Avocats', 'pt': 'Abacates', 'sw': 'Maparachichi', 'ha': 'Piya'},
+    'Palm Oil': {'fr': 'Huile de palme', 'pt': 'Óleo de palma', 'sw': 'Mafuta ya mawese', 'ha': 'Manja'},
+    'Shea Nuts': {'fr': 'Noix de karité', 'pt': 'Nozes de karité', 'sw': 'Njugu za shea', 'ha': 'Kadanya'}
+}
+
 def get_translation(key, language='en'):
     """Get translation for a given key and language"""
     try:
@@ -280,6 +321,14 @@ def get_all_translations(language='en'):
     except KeyError:
         return TRANSLATIONS['en']
 
+def get_crop_name(name, language='en'):
+    """Get the local name of a crop, falling back to its English name"""
+    return CROP_NAME_TRANSLATIONS.get(name, {}).get(language, name)
+
+def get_crop_synonyms():
+    """Get every crop's local names, keyed by English crop name"""
+    return {name: sorted(set(names.values())) for name, names in CROP_NAME_TRANSLATIONS.items()}
+
 def add_translation(key, translations_dict):
     """Add a new translation key with translations for all languages"""
     for lang, translation in translations_dict.items():
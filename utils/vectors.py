@@ -0,0 +1,170 @@
+import numpy as np
+
+# Relative weight of each feature group in a product vector
+FEATURE_WEIGHTS = {
+    'category': 1.0,
+    'region': 0.5,
+    'season': 0.5,
+    'price': 0.6,
+    'water': 0.4,
+    'nutrition': 0.6,
+}
+
+SEASONS = ['wet', 'dry', 'year-round']
+WATER_LEVELS = {'low': 0.0, 'moderate': 0.5, 'high': 1.0}
+
+# Upper edges of the price bands in $/kg; anything above the last is the top band
+PRICE_BANDS = [1.0, 2.0, 4.0, 8.0, 16.0]
+
+# Scale of each nutrition value per 100g, roughly its maximum across crops
+NUTRITION_SCALE = {'calories': 900.0, 'protein': 40.0, 'carbs': 100.0}
+
+# Catalogs smaller than this are searched exactly; larger ones through LSH.
+# Around here LSH starts to beat brute force (benchmarks/similarity_benchmark.py)
+ANN_THRESHOLD = 100000
+
+class ProductVectors:
+    """Unit-length feature vectors of products for cosine similarity.
+
+    Each product becomes one row of a float32 matrix: one-hot category,
+    region and season, its price band, water requirement and nutrition
+    values, each group scaled by FEATURE_WEIGHTS. Rows are L2-normalized,
+    so the dot product of two rows is their cosine similarity.
+    Marketplace listings without crop fields fall back to 'location' for
+    the region, and their missing features stay zero.
+    """
+
+    def __init__(self, products, weights=FEATURE_WEIGHTS):
+        self.weights = weights
+        self.categories = {name: i for i, name in enumerate(sorted({p.get('category') or '' for p in products}))}
+        self.regions = {name: i for i, name in enumerate(sorted({_region(p) for p in products}))}
+        self.size = len(self.categories) + len(self.regions) + len(SEASONS) + 2 + len(NUTRITION_SCALE)
+        self.matrix = self.encode(products)
+
+    def encode(self, products):
+        """Get the normalized vectors of products as an (n, size) array"""
+        matrix = np.zeros((len(products), self.size), np.float32)
+        weights = self.weights
+        regions_at = len(self.categories)
+        seasons_at = regions_at + len(self.regions)
+        numeric_at = seasons_at + len(SEASONS)
+
+        for row, product in enumerate(products):
+            category = self.categories.get(product.get('category') or '')
+            if category is not None:
+                matrix[row, category] = weights['category']
+            region = self.regions.get(_region(product))
+            if region is not None:
+                matrix[row, regions_at + region] = weights['region']
+            if product.get('season') in SEASONS:
+                matrix[row, seasons_at + SEASONS.index(product['season'])] = weights['season']
+
+            price = product.get('price_per_kg', product.get('price'))
+            if price is not None:
+                band = np.searchsorted(PRICE_BANDS, price)
+                matrix[row, numeric_at] = weights['price'] * band / len(PRICE_BANDS)
+            water = WATER_LEVELS.get(product.get('water_requirement'))
+            if water is not None:
+                matrix[row, numeric_at + 1] = weights['water'] * water
+            nutrition = product.get('nutrition') or {}
+            for i, (name, scale) in enumerate(NUTRITION_SCALE.items()):
+                value = nutrition.get(name)
+                if value is not None:
+                    matrix[row, numeric_at + 2 + i] = weights['nutrition'] * min(value / scale, 1.0)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+def _region(product):
+    """Get a product's growing region, or the seller location of a listing"""
+    return product.get('region') or product.get('location') or ''
+
+def exact_neighbors(matrix, queries, k, batch_size=1024):
+    """Get (indices, scores) of the k rows of matrix most similar to each query row.
+
+    Brute force over all rows, in batches of query rows so the score matrix
+    stays bounded; both results are (len(queries), k) arrays, most similar
+    first.
+    """
+    k = min(k, len(matrix))
+    indices = np.empty((len(queries), k), np.int64)
+    scores = np.empty((len(queries), k), np.float32)
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start:start + batch_size] @ matrix.T
+        if k < len(matrix):
+            top = np.argpartition(-batch, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(matrix)), batch.shape)
+        top_scores = np.take_along_axis(batch, top, axis=1)
+        # Order the survivors by score, then by index for stable ties
+        order = np.lexsort((top, -top_scores), axis=1)
+        indices[start:start + batch_size] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + batch_size] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+class LSHIndex:
+    """Approximate cosine nearest-neighbour index by random-hyperplane LSH.
+
+    Each of the tables hashes a vector to bits sign bits of its projections
+    onto random hyperplanes; rows are kept sorted by hash so a bucket is a
+    binary search. A query gathers the rows sharing its bucket in any table,
+    plus the buckets one bit away on its probes least certain bits, and
+    ranks those candidates exactly.
+    """
+
+    def __init__(self, matrix, tables=8, bits=24, probes=2, seed=0):
+        self.matrix = matrix
+        self.probes = probes
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, matrix.shape[1], bits)).astype(np.float32)
+        self.powers = 1 << np.arange(bits, dtype=np.int64)
+        self.orders = []
+        self.codes = []
+        for planes in self.planes:
+            codes = ((matrix @ planes) > 0) @ self.powers
+            order = np.argsort(codes, kind='stable')
+            self.orders.append(order)
+            self.codes.append(codes[order])
+
+    def candidates(self, vector):
+        """Get the positions of rows hashed near a vector in any table"""
+        found = []
+        for planes, order, codes in zip(self.planes, self.orders, self.codes):
+            projections = vector @ planes
+            code = int((projections > 0) @ self.powers)
+            probe_codes = [code] + [code ^ int(self.powers[bit]) for bit in np.argsort(np.abs(projections))[:self.probes]]
+            for probe in probe_codes:
+                start, end = np.searchsorted(codes, [probe, probe + 1])
+                found.append(order[start:end])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, np.int64)
+
+    def search(self, vector, k):
+        """Get (indices, scores) of up to k approximate nearest rows, most similar first"""
+        candidates = self.candidates(vector)
+        scores = self.matrix[candidates] @ vector
+        order = np.lexsort((candidates, -scores))[:k]
+        return candidates[order], scores[order]
+
+class SimilarityIndex:
+    """Similar-product lookup over a product list.
+
+    Uses exact brute-force search below ann_threshold products and an
+    LSHIndex above it, where scanning every vector per query gets slow.
+    """
+
+    def __init__(self, products, ann_threshold=ANN_THRESHOLD):
+        self.products = products
+        self.vectors = ProductVectors(products)
+        self.ann = LSHIndex(self.vectors.matrix) if len(products) >= ann_threshold else None
+
+    def nearest(self, vector, k):
+        """Get (indices, scores) of the k products nearest a normalized vector"""
+        if self.ann is not None:
+            return self.ann.search(vector, k)
+        indices, scores = exact_neighbors(self.vectors.matrix, vector[None, :], k)
+        return indices[0], scores[0]
+
+    def similar_to(self, product, k=5):
+        """Get the k products most similar to a product, which may be outside the list"""
+        indices, _ = self.nearest(self.vectors.encode([product])[0], k)
+        return [self.products[i] for i in indices]
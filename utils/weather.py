@@ -1,24 +1,28 @@
 import requests
 import os
-import random
 from datetime import datetime, timedelta
+from utils.rng import daily_rng
 
-def get_weather_info(location):
-    """Get weather information for a specific location"""
+def get_weather_info(location, rng=None):
+    """Get weather information for a specific location.
+
+    Mock data is drawn from rng, by default the location's generator for
+    the day, so it does not change between reruns.
+    """
     
     # Try to get real weather data from API
     api_key = os.getenv("OPENWEATHER_API_KEY")
     
     if api_key:
         try:
-            return get_real_weather_data(location, api_key)
+            return get_real_weather_data(location, api_key, rng)
         except:
             pass
     
     # Fallback to realistic mock data
-    return get_mock_weather_data(location)
+    return get_mock_weather_data(location, rng)
 
-def get_real_weather_data(location, api_key):
+def get_real_weather_data(location, api_key, rng=None):
     """Get real weather data from OpenWeatherMap API"""
     
     base_url = "https://api.openweathermap.org/data/2.5/weather"
@@ -43,14 +47,14 @@ def get_real_weather_data(location, api_key):
         'description': data['weather'][0]['description'].title(),
         'pressure': data['main']['pressure'],
         'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
-        'uv_index': get_uv_index(data['coord']['lat'], data['coord']['lon'], api_key),
+        'uv_index': get_uv_index(data['coord']['lat'], data['coord']['lon'], api_key, rng),
         'advice': generate_agricultural_advice(data)
     }
     
     return weather_info
 
-def get_uv_index(lat, lon, api_key):
-    """Get UV index for given coordinates"""
+def get_uv_index(lat, lon, api_key, rng=None):
+    """Get UV index for given coordinates, or a seeded estimate when the API fails"""
     try:
         uv_url = "https://api.openweathermap.org/data/2.5/uvi"
         params = {
@@ -63,10 +67,11 @@ def get_uv_index(lat, lon, api_key):
         data = response.json()
         return round(data.get('value', 5))
     except:
-        return random.randint(3, 9)
+        return (rng or daily_rng('uv', lat, lon)).randint(3, 9)
 
-def get_mock_weather_data(location):
-    """Generate realistic mock weather data for African locations"""
+def get_mock_weather_data(location, rng=None):
+    """Generate realistic mock weather data for African locations, the same all day unless another rng is given"""
+    rng = rng or daily_rng('weather', location)
     
     # Base weather patterns for different African regions
     weather_patterns = {
@@ -125,15 +130,15 @@ def get_mock_weather_data(location):
     
     weather_info = {
         'location': location,
-        'temperature': random.randint(*pattern['temp_range']) + temp_adjustment,
-        'humidity': max(20, min(95, random.randint(*pattern['humidity_range']) + humidity_adjustment)),
-        'rainfall': max(0, random.randint(*pattern['rainfall_range']) + rainfall_adjustment),
-        'wind_speed': random.randint(*pattern['wind_range']),
-        'description': random.choice(['Sunny', 'Partly Cloudy', 'Cloudy', 'Light Rain', 'Clear']),
-        'pressure': random.randint(1010, 1025),
-        'visibility': random.randint(8, 15),
-        'uv_index': random.randint(6, 11),
-        'advice': generate_mock_agricultural_advice(region_type, current_month)
+        'temperature': rng.randint(*pattern['temp_range']) + temp_adjustment,
+        'humidity': max(20, min(95, rng.randint(*pattern['humidity_range']) + humidity_adjustment)),
+        'rainfall': max(0, rng.randint(*pattern['rainfall_range']) + rainfall_adjustment),
+        'wind_speed': rng.randint(*pattern['wind_range']),
+        'description': rng.choice(['Sunny', 'Partly Cloudy', 'Cloudy', 'Light Rain', 'Clear']),
+        'pressure': rng.randint(1010, 1025),
+        'visibility': rng.randint(8, 15),
+        'uv_index': rng.randint(6, 11),
+        'advice': generate_mock_agricultural_advice(region_type, current_month, rng)
     }
     
     return weather_info
@@ -167,8 +172,9 @@ def generate_agricultural_advice(weather_data):
     
     return " ".join(advice)
 
-def generate_mock_agricultural_advice(region_type, month):
+def generate_mock_agricultural_advice(region_type, month, rng=None):
     """Generate mock agricultural advice based on region and season"""
+    rng = rng or daily_rng('advice', region_type, month)
     
     seasonal_advice = {
         'dry_season': [
@@ -215,25 +221,25 @@ def generate_mock_agricultural_advice(region_type, month):
     
     # Combine seasonal and regional advice
     advice_pool = seasonal_advice[season] + regional_advice[region_type]
-    selected_advice = random.sample(advice_pool, min(2, len(advice_pool)))
+    selected_advice = rng.sample(advice_pool, min(2, len(advice_pool)))
     
     return " ".join(selected_advice)
 
-def get_extended_forecast(location, days=7):
-    """Get extended weather forecast for multiple days"""
+def get_extended_forecast(location, days=7, rng=None):
+    """Get extended weather forecast for multiple days, drawing any mock values from rng"""
     
     api_key = os.getenv("OPENWEATHER_API_KEY")
     
     if api_key:
         try:
-            return get_real_extended_forecast(location, api_key, days)
+            return get_real_extended_forecast(location, api_key, days, rng)
         except:
             pass
     
     # Fallback to mock forecast
-    return get_mock_extended_forecast(location, days)
+    return get_mock_extended_forecast(location, days, rng)
 
-def get_real_extended_forecast(location, api_key, days):
+def get_real_extended_forecast(location, api_key, days, rng=None):
     """Get real extended forecast from OpenWeatherMap API"""
     
     base_url = "https://api.openweathermap.org/data/2.5/forecast"
@@ -249,6 +255,8 @@ def get_real_extended_forecast(location, api_key, days):
     
     data = response.json()
     
+    rng = rng or daily_rng('forecast', location)
+    
     # Process forecast data
     daily_forecasts = []
     current_date = None
@@ -260,7 +268,7 @@ def get_real_extended_forecast(location, api_key, days):
         if current_date != forecast_date:
             if daily_data:
                 # Process previous day's data
-                daily_forecast = process_daily_forecast_data(daily_data, current_date)
+                daily_forecast = process_daily_forecast_data(daily_data, current_date, rng)
                 daily_forecasts.append(daily_forecast)
             
             current_date = forecast_date
@@ -270,12 +278,12 @@ def get_real_extended_forecast(location, api_key, days):
     
     # Process last day
     if daily_data:
-        daily_forecast = process_daily_forecast_data(daily_data, current_date)
+        daily_forecast = process_daily_forecast_data(daily_data, current_date, rng)
         daily_forecasts.append(daily_forecast)
     
     return daily_forecasts[:days]
 
-def process_daily_forecast_data(daily_data, date):
+def process_daily_forecast_data(daily_data, date, rng=None):
     """Process hourly forecast data into daily summary"""
     
     temps = [item['main']['temp'] for item in daily_data]
@@ -288,29 +296,30 @@ def process_daily_forecast_data(daily_data, date):
         'max_temp': round(max(temps)),
         'avg_humidity': round(sum(humidities) / len(humidities)),
         'description': max(set(descriptions), key=descriptions.count),
-        'rainfall_probability': random.randint(0, 100)  # Not available in free API
+        'rainfall_probability': (rng or daily_rng('rainfall', date)).randint(0, 100)  # Not available in free API
     }
 
-def get_mock_extended_forecast(location, days):
-    """Generate mock extended forecast"""
+def get_mock_extended_forecast(location, days, rng=None):
+    """Generate mock extended forecast around the location's mock weather for today"""
     
     base_weather = get_mock_weather_data(location)
+    rng = rng or daily_rng('forecast', location)
     forecasts = []
     
     for i in range(days):
         date = datetime.now() + timedelta(days=i)
         
         # Add some variation to base weather
-        temp_variation = random.randint(-3, 3)
-        humidity_variation = random.randint(-10, 10)
+        temp_variation = rng.randint(-3, 3)
+        humidity_variation = rng.randint(-10, 10)
         
         forecast = {
             'date': date.strftime('%A, %B %d'),
             'min_temp': base_weather['temperature'] - 5 + temp_variation,
             'max_temp': base_weather['temperature'] + 5 + temp_variation,
             'avg_humidity': max(20, min(95, base_weather['humidity'] + humidity_variation)),
-            'description': random.choice(['Sunny', 'Partly Cloudy', 'Cloudy', 'Light Rain', 'Clear']),
-            'rainfall_probability': random.randint(0, 80)
+            'description': rng.choice(['Sunny', 'Partly Cloudy', 'Cloudy', 'Light Rain', 'Clear']),
+            'rainfall_probability': rng.randint(0, 80)
         }
         
         forecasts.append(forecast)